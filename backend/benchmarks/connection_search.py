@@ -0,0 +1,120 @@
+"""
+Time connection searches on the in-memory route graph against hop-by-hop SQL queries.
+
+Runs against a throwaway test database, so it never touches db.sqlite3:
+
+    python benchmarks/connection_search.py --airports 60 --routes 600 --days 90
+"""
+import argparse
+import io
+import os
+import random
+import statistics
+import sys
+import time as timer
+from datetime import timedelta
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'flight_booking.settings')
+django.setup()
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from flights.models import Flight
+from flights.routes import LEG_FIELDS, Leg, RouteGraph
+
+MIN_LAYOVER = timedelta(minutes=settings.CONNECTION_MIN_LAYOVER)
+MAX_LAYOVER = timedelta(minutes=settings.CONNECTION_MAX_LAYOVER)
+
+
+def sql_connections(origin, destination, start, end, max_stops):
+    # The same search with one query per itinerary prefix
+    def departures(code, after, before):
+        queryset = Flight.objects.filter(departure_code=code, departure_time__gte=after, departure_time__lt=before)
+        return [Leg(*row) for row in queryset.exclude(status='cancelled').values_list(*LEG_FIELDS)]
+
+    results = []
+    paths = [(leg,) for leg in departures(origin, start, end)]
+    for stops in range(max_stops + 1):
+        onward = []
+        for path in paths:
+            last = path[-1]
+            if last.arrival_code == destination:
+                results.append(path)
+            elif stops < max_stops:
+                visited = {leg.departure_code for leg in path}
+                onward.extend(
+                    path + (leg,) for leg in departures(last.arrival_code, last.arrival_time + MIN_LAYOVER, last.arrival_time + MAX_LAYOVER)
+                    if leg.arrival_code not in visited
+                )
+        paths = onward
+    return results
+
+
+def measure(search, cases):
+    samples = []
+    for case in cases:
+        began = timer.perf_counter()
+        search(*case)
+        samples.append((timer.perf_counter() - began) * 1000)
+    samples.sort()
+    return {
+        'median_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[int(len(samples) * 0.95) - 1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--airports', type=int, default=60)
+    parser.add_argument('--routes', type=int, default=600)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    test_db = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        call_command(
+            'generate_schedule', airports=args.airports, routes=args.routes, days=args.days,
+            users=0, seed=args.seed, stdout=io.StringIO(),
+        )
+        print(f'{Flight.objects.count()} flights on {test_db}')
+        # As if the schedule were loaded a while ago, outside the refresh overlap window
+        Flight.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+        graph = RouteGraph()
+        began = timer.perf_counter()
+        graph.refresh(force=True)
+        print(f'Built the route graph in {(timer.perf_counter() - began) * 1000:.0f}ms')
+
+        # A refresh after a handful of seat-count writes only reads the changed rows
+        ids = list(Flight.objects.values_list('id', flat=True)[:100])
+        Flight.objects.filter(id__in=ids).update(available_seats=F('available_seats') - 1, updated_at=timezone.now())
+        began = timer.perf_counter()
+        graph.refresh(force=True)
+        print(f'Incremental refresh of {len(ids)} changed flights in {(timer.perf_counter() - began) * 1000:.1f}ms')
+
+        rng = random.Random(args.seed + 1)
+        codes = list(graph.departures)
+        start = timezone.localdate()
+        cases = []
+        for _ in range(args.queries):
+            origin, destination = rng.sample(codes, 2)
+            day = timezone.make_aware(timezone.datetime.combine(start + timedelta(days=rng.randrange(args.days)), timezone.datetime.min.time()))
+            cases.append((origin, destination, day, day + timedelta(days=1), 2))
+
+        print('sql', measure(sql_connections, cases))
+        print('graph', measure(lambda *case: graph.connections(*case[:4], max_stops=case[4]), cases))
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Compare FlightSearchView filtering before and after the indexed airport codes.
+
+Runs against a throwaway test database, so it never touches db.sqlite3:
+
+    python benchmarks/flight_search.py --flights 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time as timer
+from datetime import timedelta
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'flight_booking.settings')
+django.setup()
+
+from django.db import connection
+from django.utils import timezone
+
+from flights.models import Flight
+from flights.views import day_start, filter_airport
+
+AIRPORTS = [f'Benchmark Airport {i} ({chr(65 + i // 26 % 26)}{chr(65 + i % 26)}X)' for i in range(40)]
+
+
+def generate(count, days, seed):
+    rng = random.Random(seed)
+    start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    batch = []
+    for i in range(count):
+        departure, arrival = rng.sample(AIRPORTS, 2)
+        departure_time = start + timedelta(minutes=rng.randrange(days * 24 * 60))
+        flight = Flight(
+            flight_number=f'BM{i % 100000:05d}',
+            departure_airport=departure,
+            arrival_airport=arrival,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=2),
+            price=rng.randrange(500, 5000),
+            available_seats=150,
+            total_seats=150,
+        )
+        flight.assign_airport_codes()
+        batch.append(flight)
+        if len(batch) == 10000:
+            Flight.objects.bulk_create(batch)
+            batch = []
+    Flight.objects.bulk_create(batch)
+    return start
+
+
+def legacy_search(departure, arrival, day):
+    return Flight.objects.filter(
+        departure_airport__icontains=departure,
+        arrival_airport__icontains=arrival,
+        departure_time__date=day,
+    )
+
+
+def indexed_search(departure, arrival, day):
+    queryset = filter_airport(Flight.objects.all(), 'departure', departure)
+    queryset = filter_airport(queryset, 'arrival', arrival)
+    start = day_start(day, 'departure_date')
+    return queryset.filter(departure_time__gte=start, departure_time__lt=start + timedelta(days=1))
+
+
+def measure(search, cases):
+    samples = []
+    for case in cases:
+        began = timer.perf_counter()
+        list(search(*case))
+        samples.append((timer.perf_counter() - began) * 1000)
+    samples.sort()
+    return {
+        'median_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[int(len(samples) * 0.95) - 1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--flights', type=int, default=1000000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    test_db = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        began = timer.perf_counter()
+        start = generate(args.flights, args.days, args.seed)
+        print(f'Generated {args.flights} flights in {timer.perf_counter() - began:.1f}s on {test_db}')
+
+        rng = random.Random(args.seed + 1)
+        cases = []
+        for _ in range(args.queries):
+            departure, arrival = rng.sample(AIRPORTS, 2)
+            day = (start + timedelta(days=rng.randrange(args.days))).date().isoformat()
+            cases.append((departure, arrival, day))
+
+        for name, search in [('before', legacy_search), ('after', indexed_search)]:
+            print(name, measure(search, cases))
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Compare FlightSerializer against the .values() fast path used by the flight list views.
+
+Runs against a throwaway test database, so it never touches db.sqlite3:
+
+    python benchmarks/flight_serialization.py --flights 5000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time as timer
+from datetime import timedelta
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'flight_booking.settings')
+django.setup()
+
+from django.db import connection
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from flights.fastpath import ValuesSerializer
+from flights.models import Flight
+from flights.serializers import FlightSerializer
+
+AIRPORTS = [f'Benchmark Airport {i} ({chr(65 + i // 26 % 26)}{chr(65 + i % 26)}X)' for i in range(40)]
+
+
+def generate(count, seed):
+    rng = random.Random(seed)
+    start = timezone.now().replace(microsecond=0)
+    flights = []
+    for i in range(count):
+        departure, arrival = rng.sample(AIRPORTS, 2)
+        departure_time = start + timedelta(minutes=rng.randrange(365 * 24 * 60))
+        flights.append(Flight(
+            flight_number=f'BM{i:05d}',
+            departure_airport=departure,
+            arrival_airport=arrival,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=2),
+            price=rng.randrange(50000, 500000) / 100,
+            available_seats=150,
+            total_seats=150,
+        ))
+    Flight.objects.bulk_create(Flight.link_airports(flights), batch_size=10000)
+
+
+def serializer_rows():
+    return FlightSerializer(Flight.objects.order_by('departure_time', 'id'), many=True).data
+
+
+def fast_rows():
+    serializer = ValuesSerializer(FlightSerializer)
+    return serializer.many(Flight.objects.order_by('departure_time', 'id').values(*serializer.columns))
+
+
+def measure(build, repeat):
+    renderer = JSONRenderer()
+    samples = []
+    for _ in range(repeat):
+        began = timer.perf_counter()
+        content = renderer.render(build())
+        samples.append((timer.perf_counter() - began) * 1000)
+    return content, {'median_ms': round(statistics.median(samples), 1), 'min_ms': round(min(samples), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--flights', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    test_db = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        generate(args.flights, args.seed)
+        print(f'Serializing {args.flights} flights (query + JSON render) on {test_db}')
+        expected, before = measure(serializer_rows, args.repeat)
+        actual, after = measure(fast_rows, args.repeat)
+        print('before', before)
+        print('after', after)
+        print('identical JSON:', actual == expected)
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -44,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its latency covers the rest of the stack; served at /metrics
+    'flights.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -82,9 +84,48 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts, so concurrent bookings wait their turn
+            # instead of failing with "database table is locked" when they upgrade from a read
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # A file rather than in-memory test database, where a locked table fails at once
+        # instead of waiting for the lock like it does in production
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Seconds a flight's cached seat occupancy bitmap lives before it is rebuilt
+SEAT_OCCUPANCY_CACHE_TIMEOUT = 300
+
+# Pub/sub for the seat map event stream (/api/flights/<id>/events/); the in-process broker
+# only reaches subscribers connected to the same server process
+SEAT_EVENTS_BACKEND = 'flights.events.InProcessBroker'
+# Seconds between keep-alive comments on an idle event stream
+SEAT_EVENTS_KEEPALIVE = 15
+
+# Upper bound, in seconds, on how stale a cached FlightSearchView page can be
+SEARCH_CACHE_TIMEOUT = 60
+
+# Connection search: seconds between route graph refreshes from the database, and the
+# default layover window in minutes
+ROUTE_GRAPH_REFRESH_INTERVAL = 5
+CONNECTION_MIN_LAYOVER = 45
+CONNECTION_MAX_LAYOVER = 360
+
+# Seconds a checkout seat hold keeps its seats before `manage.py release_expired_holds` frees them
+SEAT_HOLD_TTL = 600
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -131,12 +172,23 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        # Reads the user row on every request, so deactivation and demotion apply at once. Hot
+        # passenger views opt in to users.authentication.StatelessJWTAuthentication instead
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     )
 }
 
+# Seconds a full User row fetched by users.authentication.full_user() is reused across requests
+AUTH_USER_CACHE_TIMEOUT = 30
+
 CORS_ALLOW_ALL_ORIGINS = True
+# Lets the booking page see whether live seat events are served (flights.views.OccupiedSeatsView)
+CORS_EXPOSE_HEADERS = ['X-Seat-Events']
 
-# Email Settings (for synchronous sending)
+# Email Settings (queued in the outbox, delivered by `manage.py send_queued_emails`)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend' # For development, outputs to console
-DEFAULT_FROM_EMAIL = 'admin@airbooking.com'
\ No newline at end of file
+DEFAULT_FROM_EMAIL = 'admin@airbooking.com'
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60 # Seconds before the first retry, doubled on each further attempt
+EMAIL_OUTBOX_LEASE = 300 # Seconds a claimed batch is hidden from other workers while it is sent; must outlast one batch
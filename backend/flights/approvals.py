@@ -0,0 +1,41 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from users.authentication import user_cache_key
+from users.models import User
+from .outbox import queue_emails
+
+APPROVAL_EMAILS = {
+    'approved': (
+        'Your AirBooking Account Has Been Approved!',
+        'Dear {username},\n\nYour account on AirBooking has been approved. You can now log in and start booking flights!\n\nBest regards,\nThe AirBooking Team',
+    ),
+    'rejected': (
+        'Your AirBooking Account Application',
+        'Dear {username},\n\nWe are sorry, but your account application on AirBooking has not been approved.\n\nBest regards,\nThe AirBooking Team',
+    ),
+}
+
+
+def set_approval_status(users, approval_status, limit=None):
+    """
+    Move every user in the queryset to approval_status with one UPDATE.
+
+    Each changed user with an email address gets a notification queued in
+    the outbox, written with the update, for the send_queued_emails worker
+    to deliver in batches. limit caps how many users one call changes,
+    oldest sign-up first. Returns the ids of the users that changed.
+    """
+    with transaction.atomic():
+        changed = users.exclude(approval_status=approval_status).select_for_update().order_by('date_joined', 'id')
+        changed = list(changed.values_list('id', 'username', 'email')[:limit])
+        if not changed:
+            return []
+        user_ids = [user_id for user_id, _, _ in changed]
+        User.objects.filter(pk__in=user_ids).update(approval_status=approval_status)
+        if approval_status in APPROVAL_EMAILS:
+            subject, message = APPROVAL_EMAILS[approval_status]
+            queue_emails((subject, message.format(username=username), [email]) for _, username, email in changed if email)
+        # StatelessJWTAuthentication's cached rows would otherwise keep the old status
+        transaction.on_commit(lambda: cache.delete_many([user_cache_key(user_id) for user_id in user_ids]))
+    return user_ids
@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class FlightsConfig(AppConfig):
     name = 'flights'
+
+    def ready(self):
+        from .metrics import install_query_timer, instrument_serializers
+
+        # Query counts and timings for RequestMetricsMiddleware
+        connection_created.connect(install_query_timer)
+        instrument_serializers()
@@ -0,0 +1,96 @@
+from itertools import groupby
+
+from django.db import transaction
+from django.utils import timezone
+
+from .events import publish_flight_change
+from .fares import fare_key, refresh_fares_on_commit
+from .models import Booking, DisruptionNotice, Flight
+from .outbox import queue_emails
+from .search_cache import invalidate_search_routes
+
+STATUS_MESSAGES = {
+    'on_time': 'is back on schedule',
+    'delayed': 'has been delayed',
+    'cancelled': 'has been cancelled',
+}
+
+
+def set_flight_status(flights, status):
+    """
+    Move every flight in the queryset to status with one UPDATE.
+
+    Passengers are not emailed here: a DisruptionNotice records the change
+    and the send_queued_emails worker fans it out, so a large disruption
+    costs a few statements regardless of how many bookings it touches.
+    Returns the changed flights and the notice (None if nothing changed).
+    """
+    with transaction.atomic():
+        changed = list(flights.exclude(status=status).select_for_update().order_by('id'))
+        if not changed:
+            return [], None
+        now = timezone.now()
+        Flight.objects.filter(pk__in=[flight.pk for flight in changed]).update(status=status, updated_at=now)
+        for flight in changed:
+            flight.status = status
+            flight.updated_at = now
+        notice = DisruptionNotice.objects.create(status=status, flight_ids=[flight.pk for flight in changed])
+
+        def notify():
+            invalidate_search_routes({(flight.departure_code, flight.arrival_code) for flight in changed})
+            for flight in changed:
+                publish_flight_change(flight)
+        transaction.on_commit(notify)
+        refresh_fares_on_commit(fare_key(flight) for flight in changed)
+    return changed, notice
+
+
+def disruption_email(notice, username, email, bookings):
+    flights = '\n'.join(f"""
+    Flight Number: {flight_number}
+    Departure Airport: {departure_airport}
+    Arrival Airport: {arrival_airport}
+    Departure Time: {departure_time}
+    Seats Reserved: {", ".join(seats)}""" for flight_number, departure_airport, arrival_airport, departure_time, seats in bookings)
+    subject = f'Flight Update: your flight {STATUS_MESSAGES[notice.status]}'
+    message = f"""
+    Dear {username},
+
+    The following booked flight {STATUS_MESSAGES[notice.status]}:{flights}
+
+    We apologise for any inconvenience.
+
+    Best regards,
+    The AirBooking Team
+    """
+    return subject, message, [email]
+
+
+def process_disruption_notice():
+    # Queues one email per affected passenger for the oldest pending notice; returns None once none are pending
+    with transaction.atomic():
+        notice = (
+            DisruptionNotice.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True).order_by('created_at').first()
+        )
+        if notice is None:
+            return None
+        bookings = (
+            Booking.objects.filter(flight_id__in=notice.flight_ids)
+            .order_by('user_id', 'flight__departure_time', 'id')
+            .values_list(
+                'user_id', 'user__username', 'user__email', 'flight__flight_number', 'flight__departure_airport',
+                'flight__arrival_airport', 'flight__departure_time', 'seats_reserved',
+            )
+            .iterator(chunk_size=2000)
+        )
+        # Rows arrive grouped by passenger, so each passenger gets one email covering all their affected flights;
+        # passengers without an email address are skipped
+        notice.emails_queued = queue_emails(
+            disruption_email(notice, username, email, [row[3:] for row in rows])
+            for (_, username, email), rows in groupby(bookings, key=lambda row: row[:3])
+            if email
+        )
+        notice.processed_at = timezone.now()
+        notice.save(update_fields=['emails_queued', 'processed_at'])
+    return notice
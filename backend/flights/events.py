@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class InProcessBroker:
+    """
+    Fan-out of flight events to subscribers in this process.
+
+    Publishers are usually sync views running in a worker thread, so delivery
+    is handed to each subscriber's event loop with call_soon_threadsafe. A
+    subscriber that falls behind gets its backlog replaced by a single
+    ``resync`` event, telling the client to fetch a fresh snapshot.
+
+    Deployments with several server processes can point SEAT_EVENTS_BACKEND
+    at a broker with the same subscribe/unsubscribe/publish methods backed
+    by a shared channel.
+    """
+    max_backlog = 100
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+
+    def subscribe(self, channel):
+        queue = asyncio.Queue(maxsize=self.max_backlog)
+        with self.lock:
+            self.subscribers.setdefault(channel, {})[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, channel, queue):
+        with self.lock:
+            queues = self.subscribers.get(channel, {})
+            queues.pop(queue, None)
+            if not queues:
+                self.subscribers.pop(channel, None)
+
+    def publish(self, channel, event):
+        with self.lock:
+            targets = list(self.subscribers.get(channel, {}).items())
+        for queue, loop in targets:
+            try:
+                loop.call_soon_threadsafe(self.deliver, queue, event)
+            except RuntimeError:
+                # The subscriber's loop has closed; its stream is already gone
+                self.unsubscribe(channel, queue)
+
+    def deliver(self, queue, event):
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            event = {'type': 'resync'}
+        queue.put_nowait(event)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.SEAT_EVENTS_BACKEND)()
+        return _broker
+
+
+def flight_channel(flight_id):
+    return f'flight:{flight_id}'
+
+
+def publish_seat_change(flight_id, available_seats, occupied=(), held=(), released=()):
+    # Seat deltas: newly booked, newly held and freed seats, plus the resulting seat count
+    get_broker().publish(flight_channel(flight_id), {
+        'type': 'seats',
+        'available_seats': available_seats,
+        'occupied': list(occupied),
+        'held': list(held),
+        'released': list(released),
+    })
+
+
+def publish_flight_change(flight):
+    get_broker().publish(flight_channel(flight.pk), {
+        'type': 'flight',
+        'status': flight.status,
+        'departure_time': flight.departure_time.isoformat(),
+        'arrival_time': flight.arrival_time.isoformat(),
+        'available_seats': flight.available_seats,
+    })
@@ -0,0 +1,99 @@
+import csv
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+# Rows fetched per database round trip, and rows written per chunk of the response
+CHUNK_SIZE = 2000
+
+BOOKING_COLUMNS = [
+    ('booking_id', 'id'),
+    ('booking_time', 'booking_time'),
+    ('payment_status', 'payment_status'),
+    ('seats', 'seats_reserved'),
+    ('username', 'user__username'),
+    ('email', 'user__email'),
+    ('flight_id', 'flight_id'),
+    ('flight_number', 'flight__flight_number'),
+    ('departure_airport', 'flight__departure_airport'),
+    ('arrival_airport', 'flight__arrival_airport'),
+    ('departure_time', 'flight__departure_time'),
+]
+
+MANIFEST_COLUMNS = [
+    ('seat', 'seat'),
+    ('booking_id', 'booking_id'),
+    ('username', 'booking__user__username'),
+    ('first_name', 'booking__user__first_name'),
+    ('last_name', 'booking__user__last_name'),
+    ('email', 'booking__user__email'),
+    ('payment_status', 'booking__payment_status'),
+    ('booking_time', 'booking__booking_time'),
+]
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class Echo:
+    # csv.writer target that hands each formatted line back instead of buffering it
+    def write(self, value):
+        return value
+
+
+def csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        return ' '.join(value)
+    return value
+
+
+def csv_chunks(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    lines = []
+    for row in rows:
+        lines.append(writer.writerow([csv_value(value) for value in row]))
+        if len(lines) == CHUNK_SIZE:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def ndjson_chunks(header, rows):
+    encoder = DjangoJSONEncoder()
+    lines = []
+    for row in rows:
+        lines.append(encoder.encode(dict(zip(header, row))) + '\n')
+        if len(lines) == CHUNK_SIZE:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+async def async_chunks(chunks):
+    # Under ASGI a sync iterator would be read into memory in full before sending, so pull
+    # one chunk at a time on the request's sync thread, which owns the database cursor
+    next_chunk = sync_to_async(lambda: next(chunks, None))
+    while (chunk := await next_chunk()) is not None:
+        yield chunk
+
+
+def export_response(request, queryset, columns, filename, output):
+    # Streams queryset rows as CSV or NDJSON without materialising the result set
+    header = [name for name, _ in columns]
+    rows = queryset.values_list(*[field for _, field in columns]).iterator(chunk_size=CHUNK_SIZE)
+    chunks = csv_chunks(header, rows) if output == 'csv' else ndjson_chunks(header, rows)
+    if isinstance(request, ASGIRequest):
+        chunks = async_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=FORMATS[output])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{output}"'
+    return response
@@ -0,0 +1,72 @@
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyFare, Flight
+
+
+def fare_key(flight):
+    return (flight.departure_code, flight.arrival_code, timezone.localtime(flight.departure_time).date())
+
+
+def fare_rows(flights):
+    # One GROUP BY over the given flights: {(departure_code, arrival_code, date): (min_price, available_flights)}
+    bookable = Q(available_seats__gt=0)
+    rows = (
+        flights.exclude(status='cancelled')
+        .annotate(date=TruncDate('departure_time'))
+        .values_list('departure_code', 'arrival_code', 'date')
+        .annotate(min_price=Min('price', filter=bookable), available_flights=Count('id', filter=bookable))
+        .order_by()
+    )
+    return {(departure_code, arrival_code, date): (min_price, available) for departure_code, arrival_code, date, min_price, available in rows}
+
+
+def save_fares(rows, stale_keys=()):
+    DailyFare.objects.bulk_create(
+        [
+            DailyFare(departure_code=departure_code, arrival_code=arrival_code, date=date, min_price=min_price, available_flights=available)
+            for (departure_code, arrival_code, date), (min_price, available) in rows.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['departure_code', 'arrival_code', 'date'],
+        update_fields=['min_price', 'available_flights', 'updated_at'],
+    )
+    # Route-days with no flights left (all cancelled or moved away)
+    for departure_code, arrival_code, date in set(stale_keys) - rows.keys():
+        DailyFare.objects.filter(departure_code=departure_code, arrival_code=arrival_code, date=date).delete()
+
+
+def refresh_fares(keys):
+    # Recompute the given (departure_code, arrival_code, date) route-days from their flights
+    keys = set(keys)
+    if not keys:
+        return
+    days = [date for _, _, date in keys]
+    start = timezone.make_aware(datetime.combine(min(days), time.min))
+    end = timezone.make_aware(datetime.combine(max(days) + timedelta(days=1), time.min))
+    flights = Flight.objects.filter(
+        departure_code__in={key[0] for key in keys},
+        arrival_code__in={key[1] for key in keys},
+        departure_time__gte=start,
+        departure_time__lt=end,
+    )
+    rows = {key: value for key, value in fare_rows(flights).items() if key in keys}
+    save_fares(rows, keys)
+
+
+def refresh_fares_on_commit(keys):
+    # After commit the recompute sees every transaction that sold out or freed a flight before it
+    keys = set(keys)
+    if keys:
+        transaction.on_commit(lambda: refresh_fares(keys))
+
+
+def rebuild_fares():
+    with transaction.atomic():
+        DailyFare.objects.all().delete()
+        save_fares(fare_rows(Flight.objects.all()))
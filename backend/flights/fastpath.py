@@ -0,0 +1,88 @@
+import decimal
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.fields import ISO_8601
+from rest_framework.settings import api_settings
+
+from .metrics import timed
+
+# Fields whose to_representation() returns the database value unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.BooleanField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+def datetime_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def decimal_converter(field):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None or field.normalize_output or not coerce_to_string or field.localize:
+        return field.to_representation
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        return f'{value.quantize(exponent, rounding=rounding, context=context):f}'
+    return convert
+
+
+class ValuesSerializer:
+    """
+    Read-only stand-in for a flat ModelSerializer that renders ``.values()``
+    rows instead of model instances.
+
+    Converters are worked out once per serializer, so each row is a dict
+    comprehension rather than DRF's per-field get_attribute/to_representation
+    dispatch. The output matches the wrapped serializer exactly.
+    """
+
+    def __init__(self, serializer_class):
+        model = serializer_class.Meta.model
+        self.columns = []
+        self.plan = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            column = model._meta.get_field(field.source).attname
+            if isinstance(field, serializers.DateTimeField):
+                converter = datetime_converter(field)
+            elif isinstance(field, serializers.DecimalField):
+                converter = decimal_converter(field)
+            elif isinstance(field, PASSTHROUGH_FIELDS):
+                converter = None
+            else:
+                raise ImproperlyConfigured(f'{serializer_class.__name__}.{name} has no values() fast path.')
+            self.columns.append(column)
+            self.plan.append((name, column, converter))
+
+    def to_representation(self, row):
+        return {
+            name: row[column] if converter is None or row[column] is None else converter(row[column])
+            for name, column, converter in self.plan
+        }
+
+    def many(self, rows):
+        with timed('serializer'):
+            return [self.to_representation(row) for row in rows]
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .fares import fare_key, refresh_fares_on_commit
+from .models import Flight, SeatHold, SeatReservation
+from .occupancy import seats_changed
+from .search_cache import invalidate_search_routes
+
+
+def hold_expiry():
+    return timezone.now() + timedelta(seconds=settings.SEAT_HOLD_TTL)
+
+
+def release_holds(holds):
+    # Frees the seats of the given holds and puts them back into available_seats
+    with transaction.atomic():
+        hold_ids = list(holds.select_for_update(skip_locked=True).values_list('id', flat=True))
+        if not hold_ids:
+            return 0
+        released = {}
+        for flight_id, seat in SeatReservation.objects.filter(hold_id__in=hold_ids).values_list('flight_id', 'seat'):
+            released.setdefault(flight_id, []).append(seat)
+        for flight_id, seats in released.items():
+            Flight.objects.filter(pk=flight_id).update(available_seats=F('available_seats') + len(seats), updated_at=timezone.now())
+        # Deleting the holds cascades to their seat reservations
+        SeatHold.objects.filter(id__in=hold_ids).delete()
+        flights = list(Flight.objects.filter(pk__in=released).only('available_seats', 'departure_code', 'arrival_code', 'departure_time'))
+
+        def notify():
+            for flight in flights:
+                seats_changed(flight.pk, flight.available_seats, released=released[flight.pk])
+            invalidate_search_routes({(flight.departure_code, flight.arrival_code) for flight in flights})
+        transaction.on_commit(notify)
+        # Flights that were sold out before these seats came back
+        refresh_fares_on_commit(fare_key(flight) for flight in flights if flight.available_seats == len(released[flight.pk]))
+    return len(hold_ids)
+
+
+def release_expired_holds(flight_id=None, limit=None):
+    holds = SeatHold.objects.filter(expires_at__lte=timezone.now())
+    if flight_id is not None:
+        holds = holds.filter(flight_id=flight_id)
+    if limit is not None:
+        holds = SeatHold.objects.filter(id__in=list(holds.order_by('expires_at').values_list('id', flat=True)[:limit]))
+    return release_holds(holds)
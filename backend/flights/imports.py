@@ -0,0 +1,170 @@
+import codecs
+import csv
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import BaseParser
+
+from .fares import fare_key, refresh_fares_on_commit
+from .models import Flight
+from .search_cache import invalidate_search_routes
+from .serializers import FlightSerializer
+
+# Rows written per transaction
+CHUNK_SIZE = 1000
+# Fields an upsert overwrites; available_seats moves with total_seats so seats already sold stay sold
+UPSERT_FIELDS = ['departure_airport', 'arrival_airport', 'arrival_time', 'price', 'total_seats', 'status']
+
+
+class FlightCSVParser(BaseParser):
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return read_csv(codecs.iterdecode(stream, 'utf-8'))
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ParseError(f'CSV parse error - {e}')
+
+
+def read_csv(lines):
+    # Blank cells fall back to the field default (status, total_seats) instead of failing validation
+    return [{name: value for name, value in row.items() if value not in ('', None)} for row in csv.DictReader(lines)]
+
+
+def local_date(value):
+    return timezone.localtime(value).date()
+
+
+def validate_rows(rows):
+    # Returns ([(row number, validated data)], [error report]) without touching the database
+    serializer = FlightSerializer()
+    valid, errors, seen = [], [], {}
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({'row': number, 'errors': {'non_field_errors': ['Expected an object with flight fields.']}})
+            continue
+        try:
+            # One bound serializer for every row instead of building the field tree per row
+            data = serializer.run_validation(row)
+        except ValidationError as e:
+            errors.append({'row': number, 'errors': e.detail})
+            continue
+        row_errors = {}
+        if data['arrival_time'] <= data['departure_time']:
+            row_errors['arrival_time'] = ['Must be after departure_time.']
+        if data['available_seats'] > data.get('total_seats', Flight._meta.get_field('total_seats').default):
+            row_errors['available_seats'] = ['Cannot exceed total_seats.']
+        key = (data['flight_number'], local_date(data['departure_time']))
+        if key in seen:
+            row_errors['flight_number'] = [f'Duplicates row {seen[key]} (same flight number and date).']
+        else:
+            seen[key] = number
+        if row_errors:
+            errors.append({'row': number, 'errors': row_errors})
+        else:
+            valid.append((number, data))
+    return valid, errors
+
+
+def existing_flights(valid, lock=False):
+    # Flights sharing a flight number and local date with an import row: {(flight_number, date): [Flight]}
+    found = {}
+    if not valid:
+        return found
+    days = [local_date(data['departure_time']) for _, data in valid]
+    numbers = sorted({data['flight_number'] for _, data in valid})
+    window = Flight.objects.filter(
+        departure_time__gte=timezone.make_aware(datetime.combine(min(days) - timedelta(days=1), time.min)),
+        departure_time__lt=timezone.make_aware(datetime.combine(max(days) + timedelta(days=2), time.min)),
+    )
+    if lock:
+        window = window.select_for_update()
+    # Batches keep the IN list under SQLite's bound parameter limit
+    for start in range(0, len(numbers), 500):
+        for flight in window.filter(flight_number__in=numbers[start:start + 500]):
+            found.setdefault((flight.flight_number, local_date(flight.departure_time)), []).append(flight)
+    return found
+
+
+def plan_rows(valid, existing, upsert):
+    # Splits rows into new Flights and (existing Flight, data) updates, reporting clashes
+    creates, updates, errors = [], [], []
+    for number, data in valid:
+        matches = existing.get((data['flight_number'], local_date(data['departure_time'])), [])
+        same_time = [flight for flight in matches if flight.departure_time == data['departure_time']]
+        if upsert and same_time:
+            flight = same_time[0]
+            sold = flight.total_seats - flight.available_seats
+            total_seats = data.get('total_seats', flight.total_seats)
+            if total_seats < sold:
+                errors.append({'row': number, 'errors': {'total_seats': [f'{sold} seats are already sold.']}})
+            else:
+                updates.append((flight, data))
+        elif matches:
+            errors.append({'row': number, 'errors': {'flight_number': ['A flight with this number already departs that day.']}})
+        else:
+            creates.append(Flight(**data))
+    return creates, updates, errors
+
+
+def apply_updates(updates):
+    # The rows are locked by existing_flights(), so their seat counts are current
+    seat_changes = {}
+    for flight, data in updates:
+        # Seats added to or removed from the aircraft change the unsold count by the same amount
+        seat_changes[flight.pk] = data.get('total_seats', flight.total_seats) - flight.total_seats
+        for field in UPSERT_FIELDS:
+            if field in data:
+                setattr(flight, field, data[field])
+    flights = Flight.link_airports(flight for flight, _ in updates)
+    now = timezone.now()
+    # One UPDATE per row: bulk_update's per-field CASE expressions cost far more to build and run
+    for flight in flights:
+        Flight.objects.filter(pk=flight.pk).update(
+            **{field: getattr(flight, field) for field in UPSERT_FIELDS},
+            departure_code=flight.departure_code,
+            arrival_code=flight.arrival_code,
+            origin=flight.origin,
+            destination=flight.destination,
+            available_seats=F('available_seats') + seat_changes[flight.pk],
+            updated_at=now,
+        )
+
+
+def import_flights(rows, upsert=False, dry_run=False, chunk_size=CHUNK_SIZE):
+    """
+    Validate and write a list of flight dicts (FlightSerializer fields).
+
+    Valid rows are written in chunks of chunk_size, one transaction each;
+    invalid rows are skipped and reported by 1-based row number. With
+    upsert, a row matching an existing flight's flight_number and
+    departure_time updates that flight instead of clashing with it.
+    """
+    valid, errors = validate_rows(rows)
+    report = {'created': 0, 'updated': 0, 'errors': errors}
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        with transaction.atomic():
+            # Locked so bookings cannot change available_seats between the sold-seat check and the update
+            creates, updates, chunk_errors = plan_rows(chunk, existing_flights(chunk, lock=not dry_run), upsert)
+            report['errors'].extend(chunk_errors)
+            report['created'] += len(creates)
+            report['updated'] += len(updates)
+            if dry_run:
+                continue
+            Flight.objects.bulk_create(Flight.link_airports(creates))
+            if updates:
+                old_keys = [fare_key(flight) for flight, _ in updates]
+                old_routes = [(flight.departure_code, flight.arrival_code) for flight, _ in updates]
+                apply_updates(updates)
+            else:
+                old_keys, old_routes = [], []
+            written = creates + [flight for flight, _ in updates]
+            routes = old_routes + [(flight.departure_code, flight.arrival_code) for flight in written]
+            transaction.on_commit(lambda routes=routes: invalidate_search_routes(routes))
+            refresh_fares_on_commit(old_keys + [fare_key(flight) for flight in written])
+    report['errors'].sort(key=lambda error: error['row'])
+    return report
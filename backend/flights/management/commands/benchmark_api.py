@@ -0,0 +1,154 @@
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from flights.models import Flight
+from flights.occupancy import seat_label
+from users.models import User
+from users.serializers import MyTokenObtainPairSerializer
+
+ENDPOINTS = ['search', 'all-flights', 'occupied-seats', 'booking-create', 'my-trips']
+
+
+def percentile(samples, fraction):
+    # Nearest-rank percentile over already sorted samples
+    index = max(0, min(len(samples) - 1, int(round(fraction * len(samples))) - 1))
+    return samples[index]
+
+
+def server_name():
+    # A host the Host header check accepts; with DEBUG and no ALLOWED_HOSTS that is localhost
+    for host in settings.ALLOWED_HOSTS:
+        host = host.lstrip('.')
+        if host and host != '*':
+            return host
+    return 'localhost'
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the flight API endpoints in-process against the configured database and report '
+        'throughput, p50/p95/p99 latency and queries per request as JSON. '
+        'booking-create writes real bookings, so run it against a generated database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=ENDPOINTS, help='Endpoints to benchmark, in order.')
+        parser.add_argument('--requests', type=int, default=200, help='Requests sent to each endpoint.')
+        parser.add_argument('--concurrency', type=int, default=4, help='Worker threads sending requests.')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the request mix.')
+        parser.add_argument('--output', default=None, help='Write the JSON report to this file as well as stdout.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive.')
+        users = list(User.objects.filter(approval_status='approved', is_active=True).order_by('id')[:100])
+        flights = list(Flight.objects.order_by('id').values('id', 'departure_code', 'arrival_code', 'departure_time', 'total_seats')[:10000])
+        if not users or not flights:
+            raise CommandError('The database needs approved users and flights; run generate_schedule first.')
+
+        rng = random.Random(options['seed'])
+        # Minted like a real login, with the claims StatelessJWTAuthentication builds the user from
+        self.tokens = [str(MyTokenObtainPairSerializer.get_token(user).access_token) for user in users]
+        self.local = threading.local()
+
+        report = {
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'seed': options['seed'],
+            'endpoints': {},
+        }
+        for endpoint in options['endpoints']:
+            requests = [self.build_request(endpoint, rng, flights) for _ in range(options['requests'])]
+            report['endpoints'][endpoint] = self.run(requests, options['concurrency'])
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+        self.stdout.write(output)
+
+    def build_request(self, endpoint, rng, flights):
+        # Returns (method, path, params, token); token None means an anonymous request
+        flight = rng.choice(flights)
+        token = rng.choice(self.tokens)
+        if endpoint == 'search':
+            day = (flight['departure_time'] + timedelta(days=rng.randrange(-3, 4))).date().isoformat()
+            params = {'departure_airport': flight['departure_code'], 'arrival_airport': flight['arrival_code'], 'departure_date': day}
+            return 'get', reverse('flight-search'), params, None
+        if endpoint == 'all-flights':
+            return 'get', reverse('all-flights'), {}, None
+        if endpoint == 'occupied-seats':
+            return 'get', reverse('occupied-seats', args=[flight['id']]), {}, None
+        if endpoint == 'booking-create':
+            # Seats already taken come back as 400s, which still exercise the full booking path
+            seats = [seat_label(rng.randrange(flight['total_seats']))]
+            return 'post', reverse('booking-create'), {'flight_id': flight['id'], 'seats_reserved': seats}, token
+        return 'get', reverse('user-bookings'), {}, token
+
+    def send(self, request):
+        # Server errors (e.g. SQLite lock timeouts) are reported as 500s rather than aborting the run
+        method, path, params, token = request
+        if not hasattr(self.local, 'client'):
+            self.local.client = Client(SERVER_NAME=server_name(), raise_request_exception=False)
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        counter = QueryCounter()
+        began = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            if method == 'post':
+                response = self.local.client.post(path, params, content_type='application/json', **headers)
+            else:
+                response = self.local.client.get(path, params, **headers)
+        return (time.perf_counter() - began) * 1000, counter.count, response.status_code
+
+    def send_all(self, requests):
+        try:
+            return [self.send(request) for request in requests]
+        finally:
+            connection.close()
+
+    def run(self, requests, concurrency):
+        began = time.perf_counter()
+        if concurrency == 1:
+            results = [self.send(request) for request in requests]
+        else:
+            # One slice of the requests per thread, each on its own DB connection
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                slices = executor.map(self.send_all, [requests[i::concurrency] for i in range(concurrency)])
+                results = [result for chunk in slices for result in chunk]
+        elapsed = time.perf_counter() - began
+
+        latencies = sorted(latency for latency, _, _ in results)
+        queries = [count for _, count, _ in results]
+        status_codes = {}
+        for _, _, status_code in results:
+            status_codes[str(status_code)] = status_codes.get(str(status_code), 0) + 1
+        return {
+            'throughput_rps': round(len(results) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'mean_ms': round(statistics.mean(latencies), 2),
+            'queries_per_request': round(statistics.mean(queries), 2),
+            'max_queries': max(queries),
+            'status_codes': status_codes,
+        }
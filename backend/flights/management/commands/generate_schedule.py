@@ -0,0 +1,178 @@
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from flights.fares import fare_key, refresh_fares
+from flights.models import Airport, Booking, Flight, SeatReservation
+from flights.occupancy import seat_label
+from flights.search_cache import invalidate_search_routes
+from users.models import User
+
+# The real network goes first so small runs still look like the demo data
+KNOWN_AIRPORTS = [
+    'Lusaka International Airport (LUN)',
+    'Copperbelt International Airport (NLA)',
+    'Livingstone (Harry Mwanga Nkumbula) (LVI)',
+    'Mfuwe Airport (MFU)',
+]
+
+
+def airport_names(count):
+    names = KNOWN_AIRPORTS[:count]
+    taken = {name[-4:-1] for name in names}
+    index = 0
+    while len(names) < count:
+        code = ''.join(chr(65 + index // 26 ** power % 26) for power in (2, 1, 0))
+        index += 1
+        if code not in taken:
+            names.append(f'Generated City {code} Airport ({code})')
+    return names
+
+
+def build_routes(rng, names, count, max_frequency):
+    pairs = [(a, b) for a in names for b in names if a != b]
+    if count > len(pairs):
+        raise CommandError(f'{len(names)} airports only support {len(pairs)} routes.')
+    routes = []
+    for departure, arrival in rng.sample(pairs, count):
+        duration = timedelta(minutes=rng.randrange(45, 600, 5))
+        frequency = rng.randint(1, max_frequency)
+        # Fixed departure slots per route, like a published timetable
+        slots = sorted(timedelta(minutes=rng.randrange(5 * 60, 23 * 60, 5)) for _ in range(frequency))
+        price = Decimal(rng.randrange(50000, 500000)) / 100
+        routes.append((departure, arrival, duration, slots, price))
+    return routes
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic flight schedule with users, bookings and seat reservations for performance testing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--airports', type=int, default=20, help='Number of airports.')
+        parser.add_argument('--routes', type=int, default=60, help='Number of directed routes between them.')
+        parser.add_argument('--max-frequency', type=int, default=3, help='Most departures per route per day.')
+        parser.add_argument('--start', default=None, help='First schedule day as YYYY-MM-DD (default: today).')
+        parser.add_argument('--days', type=int, default=30, help='Number of schedule days.')
+        parser.add_argument('--total-seats', type=int, default=150, help='Seats per flight.')
+        parser.add_argument('--users', type=int, default=1000, help='Number of approved users to create.')
+        parser.add_argument('--load-factor', type=float, default=0.6, help='Mean share of seats booked per flight.')
+        parser.add_argument('--load-spread', type=float, default=0.15, help='Standard deviation of the per-flight load factor.')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Flights written per bulk_create transaction.')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; the same options give the same schedule.')
+        parser.add_argument('--append', action='store_true', help='Add to a database that already has flights.')
+
+    def handle(self, *args, **options):
+        if not options['append'] and Flight.objects.exists():
+            raise CommandError('Flights already exist. Pass --append to generate a schedule alongside them.')
+        if options['start']:
+            start = parse_date(options['start'])
+            if start is None:
+                raise CommandError('--start must be a date in YYYY-MM-DD format.')
+        else:
+            start = timezone.localdate()
+        if not 0 <= options['load_factor'] <= 1:
+            raise CommandError('--load-factor must be between 0 and 1.')
+
+        began = time.perf_counter()
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.counts = {'flights': 0, 'bookings': 0, 'seats': 0}
+
+        names = airport_names(options['airports'])
+        Airport.objects.for_names(names)
+        routes = build_routes(self.rng, names, options['routes'], options['max_frequency'])
+        self.user_ids = self.create_users(options['users'], options['seed'])
+
+        pending = []
+        for day in range(options['days']):
+            midnight = timezone.make_aware(datetime.combine(start + timedelta(days=day), datetime.min.time()))
+            for route_index, (departure, arrival, duration, slots, price) in enumerate(routes):
+                for slot_index, slot in enumerate(slots):
+                    departure_time = midnight + slot
+                    pending.append(Flight(
+                        flight_number=f'GS{route_index * options["max_frequency"] + slot_index + 1}',
+                        departure_airport=departure,
+                        arrival_airport=arrival,
+                        departure_time=departure_time,
+                        arrival_time=departure_time + duration,
+                        price=price,
+                        available_seats=options['total_seats'],
+                        total_seats=options['total_seats'],
+                    ))
+                    if len(pending) >= options['chunk_size']:
+                        self.write_chunk(pending)
+                        pending = []
+        if pending:
+            self.write_chunk(pending)
+
+        self.stdout.write(
+            f'Generated {len(names)} airports, {len(routes)} routes, {len(self.user_ids)} users, '
+            f'{self.counts["flights"]} flights, {self.counts["bookings"]} bookings and '
+            f'{self.counts["seats"]} seat reservations in {time.perf_counter() - began:.1f}s.'
+        )
+
+    def create_users(self, count, seed):
+        # An earlier --append run with the same seed already made some of them; those are reused
+        usernames = [f'load{seed}_{i}' for i in range(count)]
+        user_ids = dict(User.objects.filter(username__startswith=f'load{seed}_').values_list('username', 'pk'))
+        # Hashing is the slow part of create_user, so every generated user shares one hash
+        password = make_password('loadtest')
+        users = User.objects.bulk_create([
+            User(username=username, email=f'{username}@example.com', password=password, approval_status='approved')
+            for username in usernames
+            if username not in user_ids
+        ], batch_size=self.options['chunk_size'])
+        user_ids.update((user.username, user.pk) for user in users)
+        return [user_ids[username] for username in usernames]
+
+    def book_seats(self, flight):
+        # Returns the seat groups booked on the flight, one group per booking
+        if not self.user_ids:
+            return []
+        load = min(1.0, max(0.0, self.rng.gauss(self.options['load_factor'], self.options['load_spread'])))
+        seats = self.rng.sample(range(flight.total_seats), int(flight.total_seats * load))
+        groups = []
+        while seats:
+            size = self.rng.randint(1, 4)
+            groups.append([seat_label(index) for index in seats[:size]])
+            seats = seats[size:]
+        return groups
+
+    def write_chunk(self, flights):
+        seat_groups = [self.book_seats(flight) for flight in flights]
+        for flight, groups in zip(flights, seat_groups):
+            flight.available_seats = flight.total_seats - sum(len(group) for group in groups)
+
+        with transaction.atomic():
+            Flight.objects.bulk_create(Flight.link_airports(flights))
+            bookings = []
+            for flight, groups in zip(flights, seat_groups):
+                for group in groups:
+                    bookings.append(Booking(
+                        user_id=self.rng.choice(self.user_ids),
+                        flight=flight,
+                        booking_time=flight.departure_time - timedelta(minutes=self.rng.randrange(60, 90 * 24 * 60)),
+                        seats_reserved=group,
+                        payment_status='paid',
+                    ))
+            Booking.objects.bulk_create(bookings, batch_size=self.options['chunk_size'])
+            reservations = [
+                SeatReservation(flight_id=booking.flight_id, booking_id=booking.pk, seat=seat)
+                for booking in bookings
+                for seat in booking.seats_reserved
+            ]
+            SeatReservation.objects.bulk_create(reservations, batch_size=self.options['chunk_size'] * 10)
+
+        invalidate_search_routes({(flight.departure_code, flight.arrival_code) for flight in flights})
+        refresh_fares(fare_key(flight) for flight in flights)
+        self.counts['flights'] += len(flights)
+        self.counts['bookings'] += len(bookings)
+        self.counts['seats'] += len(reservations)
+        self.stdout.write(f'  {self.counts["flights"]} flights written', ending='\r')
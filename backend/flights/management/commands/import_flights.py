@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from flights.imports import CHUNK_SIZE, import_flights, read_csv
+
+
+class Command(BaseCommand):
+    help = 'Import flights from a CSV or JSON file (FlightSerializer fields), reporting rows that fail validation.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='A .csv file with a header row, or a .json file holding a list of flights.')
+        parser.add_argument('--upsert', action='store_true', help='Update flights with the same flight_number and departure_time instead of rejecting them.')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and report without writing.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Flights written per transaction.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, newline='', encoding='utf-8') as handle:
+                rows = json.load(handle) if path.endswith('.json') else read_csv(handle)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+        if not isinstance(rows, list):
+            raise CommandError('A JSON import must hold a list of flights.')
+
+        report = import_flights(rows, upsert=options['upsert'], dry_run=options['dry_run'], chunk_size=options['chunk_size'])
+        for error in report['errors']:
+            self.stderr.write(f'Row {error["row"]}: {json.dumps(error["errors"])}')
+        verb = 'Would import' if options['dry_run'] else 'Imported'
+        self.stdout.write(f'{verb} {report["created"]} new and {report["updated"]} updated flight(s); {len(report["errors"])} row(s) rejected.')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from flights.fares import rebuild_fares
+from flights.models import DailyFare
+
+
+class Command(BaseCommand):
+    help = 'Recompute the fare calendar (DailyFare) from every flight, e.g. after writes that bypassed the API.'
+
+    def handle(self, *args, **options):
+        rebuild_fares()
+        self.stdout.write(f'Rebuilt {DailyFare.objects.count()} route-day fare(s).')
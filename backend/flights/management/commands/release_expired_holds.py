@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from flights.holds import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Release checkout seat holds that have passed their expiry, returning their seats to sale.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Holds released per transaction.')
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping instead of exiting once no expired holds are left.')
+        parser.add_argument('--interval', type=float, default=15.0, help='Seconds to sleep between sweeps when --loop is set.')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            released = release_expired_holds(limit=options['batch_size'])
+            total += released
+            if released:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(f'Released {total} expired hold(s).')
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from flights.disruptions import process_disruption_notice
+from flights.outbox import deliver_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver queued outbox emails in batches over a single SMTP connection per batch, '
+        'after turning pending flight disruption notices into passenger emails.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Emails sent per SMTP connection.')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox instead of exiting once it is drained.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between polls when --loop is set.')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = total_notices = 0
+        while True:
+            notice = process_disruption_notice()
+            if notice is not None:
+                total_notices += 1
+                continue
+            sent, failed = deliver_batch(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(
+            f'Processed {total_notices} disruption notice(s). Sent {total_sent} email(s), {total_failed} failed attempt(s).'
+        )
@@ -0,0 +1,240 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Label for requests that matched no URL pattern
+UNMATCHED = 'unmatched'
+# Any other request method is counted as OTHER, so clients cannot add label values
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# The RequestStats of the request being handled; asgiref copies it into sync_to_async threads
+current_stats = ContextVar('request_metrics', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'email_time', 'active')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.email_time = 0.0
+        # Timers already running, so nested calls are not counted twice
+        self.active = set()
+
+
+@contextmanager
+def timed(kind):
+    # Adds the time spent in the block to the current request's <kind>_time, if a request is being measured
+    stats = current_stats.get()
+    if stats is None or kind in stats.active:
+        yield
+        return
+    stats.active.add(kind)
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        attribute = f'{kind}_time'
+        setattr(stats, attribute, getattr(stats, attribute) + time.perf_counter() - began)
+        stats.active.discard(kind)
+
+
+def time_queries(execute, sql, params, many, context):
+    # Execute wrapper installed on every database connection
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    began = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - began
+
+
+def install_query_timer(sender, connection, **kwargs):
+    # connection_created receiver; the wrapper object outlives reconnects, so only add it once
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
+
+
+def instrument_serializers():
+    """
+    Count DRF serializer validation and representation as serializer time.
+
+    Wraps ``data`` and ``is_valid`` on DRF's serializer base classes, which
+    every serializer in the project goes through.
+    """
+    from rest_framework import serializers
+
+    for cls in (serializers.BaseSerializer, serializers.Serializer, serializers.ListSerializer):
+        if 'data' in vars(cls) and not hasattr(cls.data.fget, 'timed'):
+            cls.data = property(timed_function(cls.data.fget))
+        if 'is_valid' in vars(cls) and not hasattr(cls.is_valid, 'timed'):
+            cls.is_valid = timed_function(cls.is_valid)
+
+
+def timed_function(function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with timed('serializer'):
+            return function(*args, **kwargs)
+    wrapper.timed = True
+    return wrapper
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum')
+
+    def __init__(self):
+        # One count per bucket plus +Inf, not cumulative until rendered
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                break
+        else:
+            index = len(LATENCY_BUCKETS)
+        self.counts[index] += 1
+        self.sum += value
+
+
+class ViewMetrics:
+    __slots__ = ('responses', 'latency', 'queries', 'db_time', 'serializer_time', 'email_time')
+
+    def __init__(self):
+        self.responses = {}
+        self.latency = Histogram()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.email_time = 0.0
+
+
+def label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+    """
+    Per-URL-name request metrics for this process, in Prometheus text format.
+
+    Each server process keeps its own counts, so with several worker
+    processes every one of them has to be scraped.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view, method, status, duration, stats):
+        with self.lock:
+            metrics = self.views.get(view)
+            if metrics is None:
+                metrics = self.views[view] = ViewMetrics()
+            key = (method, status)
+            metrics.responses[key] = metrics.responses.get(key, 0) + 1
+            metrics.latency.observe(duration)
+            metrics.queries += stats.queries
+            metrics.db_time += stats.db_time
+            metrics.serializer_time += stats.serializer_time
+            metrics.email_time += stats.email_time
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+    def render(self):
+        with self.lock:
+            views = sorted(self.views.items())
+            lines = [
+                '# HELP airbooking_http_requests_total Requests handled, by URL name, method and status code.',
+                '# TYPE airbooking_http_requests_total counter',
+            ]
+            for view, metrics in views:
+                for (method, status), count in sorted(metrics.responses.items()):
+                    lines.append(f'airbooking_http_requests_total{{view="{label(view)}",method="{method}",status="{status}"}} {count}')
+
+            lines += [
+                '# HELP airbooking_http_request_duration_seconds Time from the request reaching the middleware to the response leaving it.',
+                '# TYPE airbooking_http_request_duration_seconds histogram',
+            ]
+            for view, metrics in views:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), metrics.latency.counts):
+                    cumulative += count
+                    lines.append(f'airbooking_http_request_duration_seconds_bucket{{view="{label(view)}",le="{bound}"}} {cumulative}')
+                lines.append(f'airbooking_http_request_duration_seconds_sum{{view="{label(view)}"}} {metrics.latency.sum:.6f}')
+                lines.append(f'airbooking_http_request_duration_seconds_count{{view="{label(view)}"}} {cumulative}')
+
+            for name, attribute, description in (
+                ('airbooking_db_queries_total', 'queries', 'Database queries run while handling requests.'),
+                ('airbooking_db_query_seconds_total', 'db_time', 'Time spent executing database queries.'),
+                ('airbooking_serializer_seconds_total', 'serializer_time', 'Time spent in DRF serializer validation and representation, including any queries they run.'),
+                ('airbooking_email_seconds_total', 'email_time', 'Time spent queueing notification emails, including their outbox inserts.'),
+            ):
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+                for view, metrics in views:
+                    value = getattr(metrics, attribute)
+                    lines.append(f'{name}{{view="{label(view)}"}} {value if attribute == "queries" else f"{value:.6f}"}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetricsMiddleware:
+    """
+    Record latency, database queries and time, serializer time and email time
+    for every request, labelled by the resolved URL name.
+
+    Put it first in MIDDLEWARE so the latency covers the whole stack. A
+    streaming response is measured up to the point it starts streaming.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        began = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.record(request, response, time.perf_counter() - began, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        began = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.record(request, response, time.perf_counter() - began, stats)
+        return response
+
+    def record(self, request, response, duration, stats):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else UNMATCHED
+        method = request.method if request.method in METHODS else 'OTHER'
+        registry.record(view, method, response.status_code, duration, stats)
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_seat_reservations(apps, schema_editor):
+    Booking = apps.get_model('flights', 'Booking')
+    SeatReservation = apps.get_model('flights', 'SeatReservation')
+    claimed = set()
+    reservations = []
+    for booking in Booking.objects.order_by('booking_time', 'id').iterator():
+        for seat in booking.seats_reserved or []:
+            if (booking.flight_id, seat) in claimed:
+                continue
+            claimed.add((booking.flight_id, seat))
+            reservations.append(SeatReservation(flight_id=booking.flight_id, booking_id=booking.id, seat=seat))
+    SeatReservation.objects.bulk_create(reservations, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flights', '0004_flight_total_seats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seat', models.CharField(max_length=10)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_reservations', to='flights.booking')),
+                ('flight', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_reservations', to='flights.flight')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('flight', 'seat'), name='unique_flight_seat')],
+            },
+        ),
+        migrations.RunPython(backfill_seat_reservations, migrations.RunPython.noop),
+    ]
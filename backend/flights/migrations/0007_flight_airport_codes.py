@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:18
+
+from django.db import migrations, models
+
+from flights.models import parse_airport_code
+
+
+def populate_airport_codes(apps, schema_editor):
+    Flight = apps.get_model('flights', 'Flight')
+    flights = []
+    for flight in Flight.objects.only('departure_airport', 'arrival_airport').iterator():
+        flight.departure_code = parse_airport_code(flight.departure_airport)
+        flight.arrival_code = parse_airport_code(flight.arrival_airport)
+        flights.append(flight)
+    Flight.objects.bulk_update(flights, ['departure_code', 'arrival_code'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flights', '0006_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flight',
+            name='arrival_code',
+            field=models.CharField(blank=True, editable=False, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='flight',
+            name='departure_code',
+            field=models.CharField(blank=True, editable=False, max_length=3),
+        ),
+        migrations.RunPython(populate_airport_codes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['departure_code', 'arrival_code', 'departure_time'], name='flight_route_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['departure_time'], name='flight_departure_time_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from flights.models import parse_airport_city, parse_airport_code
+
+
+def populate_airports(apps, schema_editor):
+    Airport = apps.get_model('flights', 'Airport')
+    Flight = apps.get_model('flights', 'Flight')
+    names = set(Flight.objects.values_list('departure_airport', flat=True)) | set(Flight.objects.values_list('arrival_airport', flat=True))
+    Airport.objects.bulk_create([
+        Airport(name=name, code=parse_airport_code(name), city=parse_airport_city(name)) for name in names
+    ], batch_size=1000)
+    airport_ids = dict(Airport.objects.values_list('name', 'id'))
+    flights = []
+    for flight in Flight.objects.only('departure_airport', 'arrival_airport').iterator():
+        flight.origin_id = airport_ids[flight.departure_airport]
+        flight.destination_id = airport_ids[flight.arrival_airport]
+        flights.append(flight)
+    Flight.objects.bulk_update(flights, ['origin', 'destination'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flights', '0008_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Airport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(blank=True, db_index=True, max_length=3)),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('city', models.CharField(blank=True, max_length=100)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='flight',
+            name='destination',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='arriving_flights', to='flights.airport'),
+        ),
+        migrations.AddField(
+            model_name='flight',
+            name='origin',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='departing_flights', to='flights.airport'),
+        ),
+        migrations.RunPython(populate_airports, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flights', '0009_airport'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='seatreservation',
+            name='booking',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='seat_reservations', to='flights.booking'),
+        ),
+        migrations.CreateModel(
+            name='SeatHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seats', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField()),
+                ('flight', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to='flights.flight')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='seatreservation',
+            name='hold',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='seat_reservations', to='flights.seathold'),
+        ),
+        migrations.AddConstraint(
+            model_name='seatreservation',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('booking__isnull', False), ('hold__isnull', True)), models.Q(('booking__isnull', True), ('hold__isnull', False)), _connector='OR'), name='seat_reservation_booking_or_hold'),
+        ),
+        migrations.AddIndex(
+            model_name='seathold',
+            index=models.Index(fields=['expires_at'], name='seat_hold_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seathold',
+            index=models.Index(fields=['flight', 'expires_at'], name='seat_hold_flight_expires_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:10
+
+from django.db import migrations, models
+
+from flights.fares import fare_rows
+
+
+def populate_daily_fares(apps, schema_editor):
+    DailyFare = apps.get_model('flights', 'DailyFare')
+    Flight = apps.get_model('flights', 'Flight')
+    DailyFare.objects.bulk_create([
+        DailyFare(departure_code=departure_code, arrival_code=arrival_code, date=date, min_price=min_price, available_flights=available)
+        for (departure_code, arrival_code, date), (min_price, available) in fare_rows(Flight.objects.all()).items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flights', '0011_flight_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyFare',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('departure_code', models.CharField(max_length=3)),
+                ('arrival_code', models.CharField(max_length=3)),
+                ('date', models.DateField()),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('available_flights', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('departure_code', 'arrival_code', 'date'), name='daily_fare_route_date_uniq')],
+            },
+        ),
+        migrations.RunPython(populate_daily_fares, migrations.RunPython.noop),
+    ]
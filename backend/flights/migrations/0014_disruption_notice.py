@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-17 20:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flights', '0013_booking_time_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DisruptionNotice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('on_time', 'On Time'), ('delayed', 'Delayed'), ('cancelled', 'Cancelled')], max_length=10)),
+                ('flight_ids', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('emails_queued', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['processed_at', 'created_at'], name='disruption_pending_idx')],
+            },
+        ),
+    ]
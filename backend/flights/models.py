@@ -1,11 +1,77 @@
 from django.db import models
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
+import re
+
+AIRPORT_CODE_PATTERN = re.compile(r'\(([A-Z]{3})\)\s*$|^([A-Z]{3})$')
+
+def parse_airport_code(name):
+    # "Lusaka International Airport (LUN)" -> "LUN", "JFK" -> "JFK"
+    match = AIRPORT_CODE_PATTERN.search(name.strip())
+    if not match:
+        return ''
+    return match.group(1) or match.group(2)
+
+def parse_airport_city(name):
+    # "Lusaka International Airport (LUN)" -> "Lusaka", "Livingstone (Harry Mwanga Nkumbula) (LVI)" -> "Livingstone"
+    city = name.split('(')[0].strip()
+    for suffix in (' International Airport', ' Airport'):
+        if city.endswith(suffix):
+            city = city[:-len(suffix)]
+    return city.strip()
+
+class AirportManager(models.Manager):
+    def for_names(self, names):
+        # Returns {name: Airport}, creating any airports not seen before
+        names = set(names)
+        airports = {airport.name: airport for airport in self.filter(name__in=names)}
+        missing = names - airports.keys()
+        if missing:
+            self.bulk_create([
+                Airport(name=name, code=parse_airport_code(name), city=parse_airport_city(name))
+                for name in missing
+            ], ignore_conflicts=True)
+            airports.update({airport.name: airport for airport in self.filter(name__in=missing)})
+            Airport.invalidate_cached_list()
+        return airports
+
+class Airport(models.Model):
+    LIST_CACHE_KEY = 'flights:airports:list'
+
+    code = models.CharField(max_length=3, blank=True, db_index=True)
+    name = models.CharField(max_length=100, unique=True)
+    city = models.CharField(max_length=100, blank=True)
+
+    objects = AirportManager()
+
+    class Meta:
+        ordering = ['name']
+
+    @classmethod
+    def invalidate_cached_list(cls):
+        cache.delete(cls.LIST_CACHE_KEY)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.invalidate_cached_list()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.invalidate_cached_list()
+        return result
+
+    def __str__(self):
+        return self.name
 
 class Flight(models.Model):
     flight_number = models.CharField(max_length=10)
     departure_airport = models.CharField(max_length=100)
     arrival_airport = models.CharField(max_length=100)
+    departure_code = models.CharField(max_length=3, blank=True, editable=False)
+    arrival_code = models.CharField(max_length=3, blank=True, editable=False)
+    origin = models.ForeignKey(Airport, on_delete=models.PROTECT, null=True, editable=False, related_name='departing_flights')
+    destination = models.ForeignKey(Airport, on_delete=models.PROTECT, null=True, editable=False, related_name='arriving_flights')
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -21,10 +87,73 @@ class Flight(models.Model):
         choices=STATUS_CHOICES,
         default='on_time',
     )
+    # Bumped by every save and by the seat-count UPDATEs; drives ETag/Last-Modified
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['departure_code', 'arrival_code', 'departure_time'], name='flight_route_time_idx'),
+            models.Index(fields=['departure_time', 'id'], name='flight_departure_time_idx'),
+            models.Index(fields=['updated_at'], name='flight_updated_at_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_airports = (instance.__dict__.get('departure_airport'), instance.__dict__.get('arrival_airport'))
+        return instance
+
+    @classmethod
+    def link_airports(cls, flights):
+        # Bulk counterpart of save()'s airport handling, for bulk_create/bulk_update callers
+        flights = list(flights)
+        names = {f.departure_airport for f in flights} | {f.arrival_airport for f in flights}
+        airports = Airport.objects.for_names(names)
+        for flight in flights:
+            flight.assign_airport_codes()
+            flight.origin = airports[flight.departure_airport]
+            flight.destination = airports[flight.arrival_airport]
+            flight._loaded_airports = (flight.departure_airport, flight.arrival_airport)
+        return flights
+
+    def assign_airport_codes(self):
+        self.departure_code = parse_airport_code(self.departure_airport)
+        self.arrival_code = parse_airport_code(self.arrival_airport)
+
+    def save(self, *args, **kwargs):
+        # Only touch the Airport table when the airport names actually changed
+        if getattr(self, '_loaded_airports', None) != (self.departure_airport, self.arrival_airport) or self.origin_id is None:
+            self.link_airports([self])
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields) | {'updated_at'}
+            if {'departure_airport', 'arrival_airport'} & update_fields:
+                update_fields |= {'departure_code', 'arrival_code', 'origin', 'destination'}
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.flight_number
 
+class DailyFare(models.Model):
+    # Per route and local departure day: the cheapest bookable fare, maintained by flights.fares
+    departure_code = models.CharField(max_length=3)
+    arrival_code = models.CharField(max_length=3)
+    date = models.DateField()
+    # Null when every flight that day is sold out
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    # Flights that day that still have seats
+    available_flights = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['departure_code', 'arrival_code', 'date'], name='daily_fare_route_date_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.departure_code}-{self.arrival_code} {self.date}'
+
 class Booking(models.Model):
     PAYMENT_STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -41,5 +170,96 @@ class Booking(models.Model):
         default='pending',
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'booking_time', 'id'], name='booking_user_time_idx'),
+            models.Index(fields=['booking_time', 'id'], name='booking_time_idx'),
+        ]
+
     def __str__(self):
         return f'{self.user} - {self.flight}'
+
+class SeatHold(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    flight = models.ForeignKey(Flight, on_delete=models.CASCADE, related_name='seat_holds')
+    seats = models.JSONField(default=list)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='seat_hold_expires_idx'),
+            models.Index(fields=['flight', 'expires_at'], name='seat_hold_flight_expires_idx'),
+        ]
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    def __str__(self):
+        return f'{self.user} - {self.flight} (held)'
+
+class SeatReservation(models.Model):
+    # A seat belongs to exactly one booking or one pending hold
+    flight = models.ForeignKey(Flight, on_delete=models.CASCADE, related_name='seat_reservations')
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, null=True, related_name='seat_reservations')
+    hold = models.ForeignKey(SeatHold, on_delete=models.CASCADE, null=True, related_name='seat_reservations')
+    seat = models.CharField(max_length=10)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['flight', 'seat'], name='unique_flight_seat'),
+            models.CheckConstraint(
+                condition=models.Q(booking__isnull=False, hold__isnull=True) | models.Q(booking__isnull=True, hold__isnull=False),
+                name='seat_reservation_booking_or_hold',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.flight} - {self.seat}'
+
+class OutgoingEmail(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending',
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outgoing_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {", ".join(self.recipients)}'
+
+class DisruptionNotice(models.Model):
+    # A status change on one or more flights whose passengers still need to be told; see flights.disruptions
+    status = models.CharField(max_length=10, choices=Flight.STATUS_CHOICES)
+    flight_ids = models.JSONField(default=list)
+    created_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    # Emails queued when the notice was processed
+    emails_queued = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['processed_at', 'created_at'], name='disruption_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_status_display()}: {len(self.flight_ids)} flight(s)'
@@ -0,0 +1,115 @@
+import base64
+import hashlib
+import re
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .events import publish_seat_change
+from .models import Flight, SeatReservation
+from .search_cache import get_generation
+
+# Must match the seat letters used by the frontend seat picker (BookFlight.js)
+SEAT_LETTERS = 'ABCDEF'
+SEAT_PATTERN = re.compile(r'^(\d+)([A-Z])$')
+
+
+def seat_index(seat, total_seats):
+    match = SEAT_PATTERN.match(seat)
+    if not match or match.group(2) not in SEAT_LETTERS:
+        return None
+    row = int(match.group(1))
+    if row < 1:
+        return None
+    index = (row - 1) * len(SEAT_LETTERS) + SEAT_LETTERS.index(match.group(2))
+    return index if index < total_seats else None
+
+
+def seat_label(index):
+    row, letter = divmod(index, len(SEAT_LETTERS))
+    return f'{row + 1}{SEAT_LETTERS[letter]}'
+
+
+def occupancy_generation_key(flight_id):
+    return f'flights:occupancy:generation:{flight_id}'
+
+
+def occupancy_cache_key(flight_id, generation):
+    return f'flights:occupancy:v4:{flight_id}:{generation}'
+
+
+def build_occupancy(flight_id):
+    total_seats = Flight.objects.filter(pk=flight_id).values_list('total_seats', flat=True).first() or 0
+    # Booked seats and seats held during checkout get separate bitmaps
+    bitmaps = {False: bytearray((total_seats + 7) // 8), True: bytearray((total_seats + 7) // 8)}
+    # Seats that do not fit the standard layout are kept verbatim
+    unmapped = {False: [], True: []}
+    reservations = SeatReservation.objects.filter(flight_id=flight_id).values_list('seat', 'hold_id')
+    for seat, hold_id in reservations:
+        held = hold_id is not None
+        index = seat_index(seat, total_seats)
+        if index is None:
+            unmapped[held].append(seat)
+        else:
+            bitmaps[held][index // 8] |= 1 << (index % 8)
+    occupancy = {
+        'total_seats': total_seats,
+        'bitmap': bytes(bitmaps[False]),
+        'unmapped': sorted(unmapped[False]),
+        'held_bitmap': bytes(bitmaps[True]),
+        'held_unmapped': sorted(unmapped[True]),
+    }
+    # Content hash used as the ETag validator, so it only changes when the seat map does
+    digest = hashlib.md5(repr(sorted(occupancy.items())).encode('utf-8')).hexdigest()
+    occupancy['version'] = f'{flight_id}-{digest}'
+    return occupancy
+
+
+def get_occupancy(flight_id):
+    # A seat map built while seats change is stored under the old generation, where no later read looks
+    key = occupancy_cache_key(flight_id, get_generation(occupancy_generation_key(flight_id)))
+    occupancy = cache.get(key)
+    if occupancy is None:
+        occupancy = build_occupancy(flight_id)
+        cache.set(key, occupancy, settings.SEAT_OCCUPANCY_CACHE_TIMEOUT)
+    return occupancy
+
+
+def invalidate_occupancy(flight_id):
+    cache.set(occupancy_generation_key(flight_id), uuid.uuid4().hex, None)
+
+
+def seats_changed(flight_id, available_seats, occupied=(), held=(), released=()):
+    # Run on commit: drop the cached seat map first so subscribers that resync see the change
+    invalidate_occupancy(flight_id)
+    publish_seat_change(flight_id, available_seats, occupied=occupied, held=held, released=released)
+
+
+def seat_list(bitmap, total_seats, unmapped):
+    seats = [
+        seat_label(index)
+        for index in range(total_seats)
+        if bitmap[index // 8] & (1 << (index % 8))
+    ]
+    return seats + unmapped
+
+
+def occupied_seat_list(occupancy):
+    return seat_list(occupancy['bitmap'], occupancy['total_seats'], occupancy['unmapped'])
+
+
+def held_seat_list(occupancy):
+    return seat_list(occupancy['held_bitmap'], occupancy['total_seats'], occupancy['held_unmapped'])
+
+
+def encode_occupancy(occupancy):
+    # Bit i (LSB first within each byte) is set when seat_label(i) is occupied (bitmap) or held (held_bitmap)
+    return {
+        'total_seats': occupancy['total_seats'],
+        'seat_letters': SEAT_LETTERS,
+        'bitmap': base64.b64encode(occupancy['bitmap']).decode('ascii'),
+        'unmapped': occupancy['unmapped'],
+        'held_bitmap': base64.b64encode(occupancy['held_bitmap']).decode('ascii'),
+        'held_unmapped': occupancy['held_unmapped'],
+    }
@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .metrics import timed
+from .models import OutgoingEmail
+
+
+def queue_email(subject, message, recipient_list, from_email=None):
+    # Call inside the transaction that produced the email so both commit together
+    with timed('email'):
+        return OutgoingEmail.objects.create(
+            subject=subject,
+            body=message,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            recipients=list(recipient_list),
+        )
+
+
+def queue_emails(messages, batch_size=1000):
+    # Bulk queue_email for (subject, message, recipient_list) tuples; returns how many were queued
+    queued = 0
+    batch = []
+    with timed('email'):
+        for subject, message, recipient_list in messages:
+            batch.append(OutgoingEmail(subject=subject, body=message, from_email=settings.DEFAULT_FROM_EMAIL, recipients=list(recipient_list)))
+            if len(batch) == batch_size:
+                OutgoingEmail.objects.bulk_create(batch)
+                queued += len(batch)
+                batch = []
+        OutgoingEmail.objects.bulk_create(batch)
+    return queued + len(batch)
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def record_failure(email, error, now):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = 'failed'
+    else:
+        email.next_attempt_at = now + retry_delay(email.attempts)
+
+
+def deliver_batch(batch_size=None, connection=None):
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    sent = failed = 0
+    # Claim the batch in a short transaction: pushing next_attempt_at past the lease hides it from
+    # other workers, and from this one if it dies mid-batch, without holding locks while SMTP runs
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not emails:
+            return sent, failed
+        OutgoingEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+        )
+
+    # One SMTP session for the whole batch
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        # Nothing in the batch can go out; every message backs off as if its send failed
+        for email in emails:
+            record_failure(email, e, now)
+        failed = len(emails)
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(email.subject, email.body, email.from_email, email.recipients, connection=connection)
+                try:
+                    message.send()
+                except Exception as e:
+                    record_failure(email, e, now)
+                    failed += 1
+                else:
+                    email.attempts += 1
+                    email.status = 'sent'
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    sent += 1
+        finally:
+            connection.close()
+
+    with transaction.atomic():
+        OutgoingEmail.objects.bulk_update(
+            emails, ['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at']
+        )
+    return sent, failed
@@ -0,0 +1,121 @@
+import os
+import sys
+from collections import defaultdict
+from contextlib import ContextDecorator
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Frames from these modules are plumbing between the caller and the cursor (including
+# RequestMetricsMiddleware's execute wrapper), not the code that asked for the query
+SKIPPED_MODULES = ('django.db', 'django.utils.asyncio', 'django.utils.functional', 'contextlib', 'flights.metrics', __name__)
+# Call site frames shown per query, innermost first
+SITE_DEPTH = 3
+# Distinct statements printed per call site
+SQL_PER_SITE = 3
+SQL_WIDTH = 300
+
+
+def frame_location(frame):
+    filename = frame.f_code.co_filename
+    base_dir = str(settings.BASE_DIR)
+    if filename.startswith(base_dir + os.sep):
+        path = os.path.relpath(filename, base_dir)
+    else:
+        # Library code: the module path reads better than an absolute site-packages path
+        path = frame.f_globals.get('__name__', '?').replace('.', '/') + '.py'
+    return f'{path}:{frame.f_lineno} in {frame.f_code.co_name}'
+
+
+def call_site(frame):
+    # The SITE_DEPTH innermost frames outside SKIPPED_MODULES
+    site = []
+    while frame is not None and len(site) < SITE_DEPTH:
+        module = frame.f_globals.get('__name__', '')
+        if not module.startswith(SKIPPED_MODULES):
+            site.append(frame_location(frame))
+        frame = frame.f_back
+    return tuple(site)
+
+
+class QueryBudget(ContextDecorator):
+    """
+    Fail a test when the wrapped block runs more than ``limit`` queries.
+
+    Works as a context manager or a decorator::
+
+        with QueryBudget(3) as budget:
+            client.get(url)
+
+    Every query is recorded with its call site, so the failure lists the
+    SQL grouped by the code that ran it. With no limit it only records, for
+    comparing runs with compare_budgets().
+    """
+
+    def __init__(self, limit=None, using=DEFAULT_DB_ALIAS):
+        self.limit = limit
+        self.using = using
+        self.queries = []
+
+    def __enter__(self):
+        self.queries = []
+        self.wrapper = connections[self.using].execute_wrapper(self.record)
+        self.wrapper.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wrapper.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None and self.limit is not None and len(self) > self.limit:
+            raise AssertionError(self.report(f'{len(self)} queries ran, over the budget of {self.limit}.'))
+        return False
+
+    def __len__(self):
+        return len(self.queries)
+
+    def record(self, execute, sql, params, many, context):
+        self.queries.append((call_site(sys._getframe(1)), sql))
+        return execute(sql, params, many, context)
+
+    def by_site(self):
+        # {call site: [sql, ...]} in the order the sites first ran a query
+        sites = defaultdict(list)
+        for site, sql in self.queries:
+            sites[site].append(sql)
+        return sites
+
+    def report(self, heading, changed=None):
+        # changed limits the report to {innermost location: count label}, as built by compare_budgets()
+        lines = [heading, 'Queries by call site:']
+        for site, statements in self.by_site().items():
+            location = site[0] if site else '?'
+            if changed is not None and location not in changed:
+                continue
+            lines.append(f'  {changed[location] if changed is not None else len(statements)}x {location}')
+            lines.extend(f'      <- {caller}' for caller in site[1:])
+            for sql in list(dict.fromkeys(statements))[:SQL_PER_SITE]:
+                lines.append(f'      {sql[:SQL_WIDTH]}{"..." if len(sql) > SQL_WIDTH else ""}')
+        return '\n'.join(lines)
+
+
+def location_counts(budget):
+    # Queries per innermost call site location, whoever called into it
+    counts = defaultdict(int)
+    for site, _ in budget.queries:
+        counts[site[0] if site else '?'] += 1
+    return counts
+
+
+def compare_budgets(smaller, larger):
+    """
+    Return None when two recordings of the same request ran as many queries,
+    or a report of the call sites whose query count changed between them.
+    """
+    if len(smaller) == len(larger):
+        return None
+    small_counts, large_counts = location_counts(smaller), location_counts(larger)
+    changed = {
+        location: f'{small_counts.get(location, 0)} -> {count}'
+        for location, count in large_counts.items()
+        if count != small_counts.get(location, 0)
+    }
+    return larger.report(f'Query count changed with the data size: {len(smaller)} -> {len(larger)}.', changed)
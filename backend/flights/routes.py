@@ -0,0 +1,157 @@
+import bisect
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Flight
+
+LEG_FIELDS = (
+    'id', 'flight_number', 'departure_code', 'arrival_code', 'departure_time', 'arrival_time',
+    'price', 'available_seats', 'status', 'updated_at',
+)
+Leg = namedtuple('Leg', LEG_FIELDS)
+
+# Each refresh also re-reads rows stamped this long before the previous one, so a flight whose
+# updated_at was set just before a slower transaction committed is still picked up
+REFRESH_OVERLAP = timedelta(seconds=10)
+
+
+def departure_key(leg):
+    return (leg.departure_time, leg.id)
+
+
+class RouteGraph:
+    """
+    Flights held in memory as a graph of airports, for connection searches.
+
+    Each airport keeps its departures sorted by time, so the onward flights
+    inside a layover window are a bisect away. refresh() applies rows whose
+    updated_at moved since the last refresh instead of reloading the whole
+    schedule; a drop in the flight count (a delete) triggers a full rebuild.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.legs = {}
+        self.departures = {}
+        # {departure_code: {arrival_code: flight count}}; prunes searches to airports that can reach the destination
+        self.routes = {}
+        self.watermark = None
+        self.refreshed_at = None
+
+    def add(self, leg):
+        self.legs[leg.id] = leg
+        bisect.insort(self.departures.setdefault(leg.departure_code, []), leg, key=departure_key)
+        routes = self.routes.setdefault(leg.departure_code, {})
+        routes[leg.arrival_code] = routes.get(leg.arrival_code, 0) + 1
+
+    def remove(self, leg):
+        departures = self.departures[leg.departure_code]
+        index = bisect.bisect_left(departures, departure_key(leg), key=departure_key)
+        del departures[index]
+        routes = self.routes[leg.departure_code]
+        routes[leg.arrival_code] -= 1
+        if not routes[leg.arrival_code]:
+            del routes[leg.arrival_code]
+        del self.legs[leg.id]
+
+    def load(self, rows):
+        for row in rows:
+            leg = Leg(*row)
+            old = self.legs.get(leg.id)
+            if old == leg:
+                continue
+            if old is not None:
+                self.remove(old)
+            self.add(leg)
+
+    def rebuild(self):
+        self.legs, self.departures, self.routes = {}, {}, {}
+        # Sorting up front means every insort appends at the end
+        self.load(Flight.objects.order_by('departure_time', 'id').values_list(*LEG_FIELDS).iterator(chunk_size=5000))
+
+    def refresh(self, force=False):
+        with self.lock:
+            now = time.monotonic()
+            if not force and self.refreshed_at is not None and now - self.refreshed_at < settings.ROUTE_GRAPH_REFRESH_INTERVAL:
+                return
+            started = timezone.now()
+            if self.watermark is None:
+                self.rebuild()
+            else:
+                # Served by flight_updated_at_idx
+                self.load(Flight.objects.filter(updated_at__gte=self.watermark - REFRESH_OVERLAP).values_list(*LEG_FIELDS))
+                if Flight.objects.count() != len(self.legs):
+                    self.rebuild()
+            self.watermark = started
+            self.refreshed_at = now
+
+    def departures_between(self, code, start, end):
+        departures = self.departures.get(code, [])
+        index = bisect.bisect_left(departures, (start, 0), key=departure_key)
+        while index < len(departures) and departures[index].departure_time < end:
+            yield departures[index]
+            index += 1
+
+    def reaching(self, destination, flights):
+        # Airports with a route to destination taking at most `flights` flights, per count
+        reaching = [{destination}]
+        for _ in range(flights):
+            reaching.append(reaching[-1] | {
+                code for code, routes in self.routes.items() if not routes.keys().isdisjoint(reaching[-1])
+            })
+        return reaching
+
+    def connections(self, origin, destination, start, end, max_stops=2, min_layover=timedelta(minutes=45),
+                    max_layover=timedelta(hours=6), seats=1):
+        # Itineraries (tuples of legs) leaving origin in [start, end) and reaching destination;
+        # layovers are at least min_layover and shorter than max_layover
+        def bookable(leg):
+            return leg.status != 'cancelled' and leg.available_seats >= seats
+
+        with self.lock:
+            reaching = self.reaching(destination, max_stops)
+            results = []
+            paths = [(leg,) for leg in self.departures_between(origin, start, end) if bookable(leg)]
+            for stops in range(max_stops + 1):
+                onward = []
+                for path in paths:
+                    last = path[-1]
+                    if last.arrival_code == destination:
+                        results.append(path)
+                        continue
+                    if stops == max_stops:
+                        continue
+                    visited = {leg.departure_code for leg in path}
+                    # An onward flight must land where the destination is still within the remaining stops
+                    onward_codes = reaching[max_stops - stops - 1]
+                    for leg in self.departures_between(last.arrival_code, last.arrival_time + min_layover, last.arrival_time + max_layover):
+                        if bookable(leg) and leg.arrival_code in onward_codes and leg.arrival_code not in visited:
+                            onward.append(path + (leg,))
+                paths = onward
+            return results
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_route_graph():
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            _graph = RouteGraph()
+    _graph.refresh()
+    return _graph
+
+
+def itinerary_price(path):
+    return sum(leg.price for leg in path)
+
+
+def itinerary_duration(path):
+    return path[-1].arrival_time - path[0].departure_time
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import cache
+from django.utils.dateparse import parse_date
+
+from .models import parse_airport_code
+
+SEARCH_PARAMS = (
+    'departure_airport', 'arrival_airport', 'departure_date', 'start_date', 'end_date',
+    'min_price', 'max_price', 'flight_number', 'sort_by', 'sort_order', 'page_size', 'cursor', 'fields',
+)
+DATE_PARAMS = ('departure_date', 'start_date', 'end_date')
+PRICE_PARAMS = ('min_price', 'max_price')
+
+
+def normalize_search_params(params):
+    # Spellings that FlightSearchView answers identically map to the same dict
+    normalized = {}
+    for name in SEARCH_PARAMS:
+        value = params.get(name)
+        if not value:
+            continue
+        if name in ('departure_airport', 'arrival_airport'):
+            code = parse_airport_code(value)
+            # Codes match exactly; free text is matched case-insensitively
+            value = code if code else f'~{value.lower()}'
+        elif name == 'flight_number':
+            value = value.lower()
+        elif name in DATE_PARAMS:
+            try:
+                day = parse_date(value)
+            except ValueError:
+                day = None
+            value = day.isoformat() if day else value
+        elif name in PRICE_PARAMS:
+            try:
+                value = str(Decimal(value).normalize())
+            except InvalidOperation:
+                pass
+        normalized[name] = value
+    normalized.setdefault('sort_order', 'asc')
+    return normalized
+
+
+def generation_key(departure_code=None, arrival_code=None):
+    return f'flights:search:gen:{departure_code or "*"}:{arrival_code or "*"}'
+
+
+def search_generation_key(normalized):
+    # A search scoped to airport codes only goes stale when flights touching those codes change
+    departure = normalized.get('departure_airport', '~')
+    arrival = normalized.get('arrival_airport', '~')
+    return generation_key(
+        None if departure.startswith('~') else departure,
+        None if arrival.startswith('~') else arrival,
+    )
+
+
+def get_generation(key):
+    generation = cache.get(key)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        if not cache.add(key, generation, None):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def search_cache_key(request):
+    normalized = normalize_search_params(request.query_params)
+    generation = get_generation(search_generation_key(normalized))
+    # Pagination links are absolute, so the host is part of the key
+    digest = hashlib.md5(json.dumps([request.get_host(), sorted(normalized.items())]).encode('utf-8')).hexdigest()
+    return f'flights:search:{generation}:{digest}'
+
+
+def invalidate_search_routes(routes):
+    # routes: (departure_code, arrival_code) pairs whose flights changed
+    keys = {generation_key()}
+    for departure_code, arrival_code in routes:
+        keys.update([
+            generation_key(departure_code or None, arrival_code or None),
+            generation_key(departure_code or None),
+            generation_key(None, arrival_code or None),
+        ])
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
@@ -1,19 +1,115 @@
 from rest_framework import serializers
-from .models import Flight, Booking
+from .models import Flight, Booking, SeatHold, parse_airport_code
 
 class FlightSerializer(serializers.ModelSerializer):
     class Meta:
         model = Flight
         fields = '__all__'
 
+class CompactFlightSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Flight
+        fields = ['id', 'flight_number', 'departure_time', 'arrival_time', 'status']
+
+class ConnectionLegSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Flight
+        fields = ['id', 'flight_number', 'departure_code', 'arrival_code', 'departure_time', 'arrival_time', 'price', 'status']
+
 class BookingSerializer(serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source='user.username')
     flight = FlightSerializer(read_only=True)
     booking_time = serializers.ReadOnlyField()
     flight_id = serializers.PrimaryKeyRelatedField(queryset=Flight.objects.all(), write_only=True, source='flight')
+    # Each item becomes a SeatReservation key, so the model's free-form JSON is not enough
+    seats_reserved = serializers.ListField(child=serializers.CharField(max_length=10), allow_empty=False)
 
     class Meta:
         model = Booking
         fields = ['id', 'user', 'flight', 'flight_id', 'booking_time', 'payment_status', 'seats_reserved']
 
+class CompactBookingSerializer(BookingSerializer):
+    flight = CompactFlightSerializer(read_only=True)
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    user = serializers.ReadOnlyField(source='user.username')
+    flight_id = serializers.PrimaryKeyRelatedField(queryset=Flight.objects.all(), source='flight')
+    seats = serializers.ListField(child=serializers.CharField(max_length=10), allow_empty=False)
+
+    class Meta:
+        model = SeatHold
+        fields = ['id', 'user', 'flight_id', 'seats', 'created_at', 'expires_at']
+        read_only_fields = ['created_at', 'expires_at']
+
+class ItinerarySegmentSerializer(serializers.Serializer):
+    flight_id = serializers.IntegerField()
+    seats_reserved = serializers.ListField(child=serializers.CharField(max_length=10), allow_empty=False)
+
+class ItinerarySerializer(serializers.Serializer):
+    MAX_SEGMENTS = 6
+
+    segments = ItinerarySegmentSerializer(many=True, allow_empty=False, max_length=MAX_SEGMENTS)
+    payment_status = serializers.ChoiceField(choices=Booking.PAYMENT_STATUS_CHOICES, default='pending')
+
+    def validate_segments(self, segments):
+        flight_ids = [segment['flight_id'] for segment in segments]
+        if len(set(flight_ids)) != len(flight_ids):
+            raise serializers.ValidationError('Each flight can appear only once in an itinerary.')
+        # One query for all segments instead of a lookup per flight_id
+        flights = Flight.objects.in_bulk(flight_ids)
+        missing = [flight_id for flight_id in flight_ids if flight_id not in flights]
+        if missing:
+            raise serializers.ValidationError(f'Invalid flight_id {missing[0]} - object does not exist.')
+        return [
+            {'flight': flights[segment['flight_id']], 'seats_reserved': segment['seats_reserved']}
+            for segment in segments
+        ]
+
+class BulkFlightStatusSerializer(serializers.Serializer):
+    MAX_FLIGHTS = 5000
+
+    status = serializers.ChoiceField(choices=Flight.STATUS_CHOICES)
+    flight_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False, max_length=MAX_FLIGHTS)
+    # Or every flight leaving `airport` between start and end, plus every flight due to land there in that window
+    airport = serializers.CharField(required=False)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate_airport(self, value):
+        code = parse_airport_code(value)
+        if not code:
+            raise serializers.ValidationError('Enter an airport code, e.g. "LUN" or "Lusaka International Airport (LUN)".')
+        return code
+
+    def validate(self, data):
+        window = [name for name in ('airport', 'start', 'end') if name in data]
+        if ('flight_ids' in data) == bool(window):
+            raise serializers.ValidationError('Give either flight_ids or airport, start and end.')
+        if window and len(window) < 3:
+            raise serializers.ValidationError('airport, start and end are required together.')
+        if window and data['end'] <= data['start']:
+            raise serializers.ValidationError({'end': 'Must be after start.'})
+        return data
+
+class BulkUserApprovalSerializer(serializers.Serializer):
+    MAX_USERS = 5000
+
+    approval_status = serializers.ChoiceField(choices=[('approved', 'Approved'), ('rejected', 'Rejected')])
+    user_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False, max_length=MAX_USERS)
+    # Or the pending users who signed up before joined_before (and after joined_after), optionally from one email domain
+    joined_before = serializers.DateTimeField(required=False)
+    joined_after = serializers.DateTimeField(required=False)
+    email_domain = serializers.CharField(required=False)
+
+    def validate_email_domain(self, value):
+        return value.strip().lstrip('@').lower()
 
+    def validate(self, data):
+        filters = [name for name in ('joined_before', 'joined_after', 'email_domain') if name in data]
+        if ('user_ids' in data) == bool(filters):
+            raise serializers.ValidationError('Give either user_ids or joined_before.')
+        if filters and 'joined_before' not in data:
+            raise serializers.ValidationError({'joined_before': 'Required when selecting users by filter.'})
+        if 'joined_after' in data and data['joined_before'] <= data['joined_after']:
+            raise serializers.ValidationError({'joined_before': 'Must be after joined_after.'})
+        return data
@@ -1,12 +1,41 @@
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase, APIClient
-from .models import Flight, Booking
+from rest_framework.test import APITestCase, APITransactionTestCase, APIClient
+from .events import publish_seat_change
+from .fastpath import ValuesSerializer
+from .metrics import registry as metrics_registry
+from .fares import rebuild_fares
+from . import occupancy
+from .occupancy import seat_label
+from .outbox import deliver_batch
+from .querybudget import QueryBudget, compare_budgets
+from .routes import get_route_graph
+from . import urls as flight_urls
+from .serializers import FlightSerializer, CompactFlightSerializer
+from .models import Airport, DisruptionNotice, Flight, Booking, SeatHold, SeatReservation, OutgoingEmail, parse_airport_code
 from users.models import User
+from users.serializers import MyTokenObtainPairSerializer
+from users import urls as user_urls
 from django.core import mail
+from django.core.cache import cache
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
+from unittest import mock
+from datetime import datetime, time, timedelta
+from types import SimpleNamespace
+import base64
+import threading
+import io
+import json
 
 class FlightAPITests(APITestCase):
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create_user(username='testuser', password='testpassword', email='test@example.com', approval_status='approved')
         self.client = APIClient()
         
@@ -17,6 +46,9 @@ class FlightAPITests(APITestCase):
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
 
         self.unauthenticated_client = APIClient()
+        self.admin = User.objects.create_user(username='admin', password='adminpassword', is_staff=True, approval_status='approved')
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(self.admin)
 
         self.flight1 = Flight.objects.create(
             flight_number='AA100',
@@ -53,11 +85,56 @@ class FlightAPITests(APITestCase):
         self.assertEqual(len(response.data), 4)
         self.assertEqual(response.data, ['JFK', 'LAX', 'MIA', 'ORD'])
 
+    def test_airport_list_cached_with_etag(self):
+        url = reverse('airport-list')
+        response = self.unauthenticated_client.get(url)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.unauthenticated_client.get(url)
+        self.assertEqual(response.data, ['JFK', 'LAX', 'MIA', 'ORD'])
+        response = self.unauthenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # A flight to a new airport invalidates the cached list and its ETag
+        Flight.objects.create(
+            flight_number='AB101',
+            departure_airport='JFK',
+            arrival_airport='Lusaka International Airport (LUN)',
+            departure_time='2026-01-20T10:00:00Z',
+            arrival_time='2026-01-21T11:00:00Z',
+            price=1200.00,
+            available_seats=150
+        )
+        response = self.unauthenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Lusaka International Airport (LUN)', response.data)
+
+    def test_flights_reference_airports(self):
+        self.assertEqual(Airport.objects.count(), 4)
+        self.assertEqual(self.flight1.origin, self.flight3.origin)
+        self.assertEqual(self.flight1.destination.code, 'LAX')
+        flight = Flight.objects.create(
+            flight_number='AB201',
+            departure_airport='Lusaka International Airport (LUN)',
+            arrival_airport='Livingstone (Harry Mwanga Nkumbula) (LVI)',
+            departure_time='2026-01-20T08:00:00Z',
+            arrival_time='2026-01-20T09:00:00Z',
+            price=1500.00,
+            available_seats=150
+        )
+        self.assertEqual((flight.origin.code, flight.origin.city), ('LUN', 'Lusaka'))
+        self.assertEqual((flight.destination.code, flight.destination.city), ('LVI', 'Livingstone'))
+        flight.arrival_airport = 'JFK'
+        flight.save(update_fields=['arrival_airport'])
+        flight.refresh_from_db()
+        self.assertEqual(flight.destination, self.flight1.origin)
+
     def test_all_flights_view(self):
         url = reverse('all-flights')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(response.data['results']), 3)
 
     def test_flight_search_view_unauthenticated(self):
         url = reverse('flight-search')
@@ -73,19 +150,19 @@ class FlightAPITests(APITestCase):
         url = reverse('flight-search')
         response = self.client.get(url, {'departure_airport': 'JFK'})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test_flight_search_by_arrival_airport(self):
         url = reverse('flight-search')
         response = self.client.get(url, {'arrival_airport': 'LAX'})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_flight_search_by_departure_date(self):
         url = reverse('flight-search')
         response = self.client.get(url, {'departure_date': '2026-01-20'})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_successful_booking(self):
         url = reverse('booking-create')
@@ -93,6 +170,9 @@ class FlightAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.flight1.refresh_from_db()
         self.assertEqual(self.flight1.available_seats, 0)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.filter(status='pending').count(), 1)
+        call_command('send_queued_emails', stdout=io.StringIO())
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, 'Your Flight Booking Confirmation')
         self.assertEqual(mail.outbox[0].to, ['test@example.com'])
@@ -103,7 +183,17 @@ class FlightAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.flight3.refresh_from_db()
         self.assertEqual(self.flight3.available_seats, 0)
-        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_booking_rejects_malformed_seats(self):
+        url = reverse('booking-create')
+        for seats in ('3C', {'x': 1}, [], [['1A']], ['1A' * 10]):
+            response = self.client.post(url, {'flight_id': self.flight2.id, 'seats_reserved': seats}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, seats)
+            self.assertIn('seats_reserved', response.data)
+        self.assertFalse(SeatReservation.objects.exists())
+        self.flight2.refresh_from_db()
+        self.assertEqual(self.flight2.available_seats, 100)
 
     def test_successful_booking_with_seat_selection(self):
         url = reverse('booking-create')
@@ -124,7 +214,46 @@ class FlightAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.flight1.refresh_from_db()
         self.assertEqual(self.flight1.available_seats, 1)
-        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_itinerary_booking(self):
+        url = reverse('itinerary-booking')
+        segments = [
+            {'flight_id': self.flight1.id, 'seats_reserved': ['1A']},
+            {'flight_id': self.flight2.id, 'seats_reserved': ['2A', '2B']},
+        ]
+        response = self.client.post(url, {'segments': segments, 'payment_status': 'paid'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([b['flight']['flight_number'] for b in response.data['bookings']], ['AA100', 'UA200'])
+        self.assertEqual(Booking.objects.filter(user=self.user, payment_status='paid').count(), 2)
+        self.assertEqual(SeatReservation.objects.filter(booking__user=self.user).count(), 3)
+        self.flight2.refresh_from_db()
+        self.assertEqual(self.flight2.available_seats, 98)
+        # One confirmation for the whole itinerary
+        email = OutgoingEmail.objects.get()
+        self.assertIn('AA100', email.body)
+        self.assertIn('UA200', email.body)
+
+    def test_itinerary_booking_is_all_or_nothing(self):
+        url = reverse('itinerary-booking')
+        segments = [
+            {'flight_id': self.flight2.id, 'seats_reserved': ['2A']},
+            {'flight_id': self.flight3.id, 'seats_reserved': ['1A']},
+        ]
+        response = self.client.post(url, {'segments': segments}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(response.data['error'].startswith('DL300: '))
+        self.flight2.refresh_from_db()
+        self.assertEqual(self.flight2.available_seats, 100)
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(SeatReservation.objects.exists())
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+        segments = [{'flight_id': self.flight2.id, 'seats_reserved': ['2A']}] * 2
+        response = self.client.post(url, {'segments': segments}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, {'segments': [{'flight_id': 999, 'seats_reserved': ['2A']}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_user_bookings_view(self):
         # Create a booking for the user
@@ -132,55 +261,992 @@ class FlightAPITests(APITestCase):
         url = reverse('user-bookings')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        booking_data = response.data[0]
+        self.assertEqual(len(response.data['results']), 1)
+        booking_data = response.data['results'][0]
         self.assertEqual(booking_data['flight']['flight_number'], self.flight1.flight_number)
         self.assertEqual(booking_data['seats_reserved'], ['1A'])
 
+    def test_user_bookings_query_count_is_fixed(self):
+        url = reverse('user-bookings')
+        Booking.objects.create(user=self.user, flight=self.flight1, seats_reserved=['1A'])
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        for flight in (self.flight1, self.flight2, self.flight3):
+            for seat in ('2A', '2B'):
+                Booking.objects.create(user=self.user, flight=flight, seats_reserved=[seat])
+        # The JWT user comes from token claims, so only the page of bookings with user and flight joined is queried
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 7)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('booking-detail', args=[response.data['results'][0]['id']]))
+        self.assertEqual(response.data['user'], 'testuser')
+
+    def test_compact_fields_mode(self):
+        booking = Booking.objects.create(user=self.user, flight=self.flight1, seats_reserved=['1A'])
+        compact_fields = ['id', 'flight_number', 'departure_time', 'arrival_time', 'status']
+        response = self.client.get(reverse('user-bookings'), {'fields': 'compact'})
+        self.assertEqual(list(response.data['results'][0]['flight']), compact_fields)
+        self.assertEqual(response.data['results'][0]['seats_reserved'], ['1A'])
+        response = self.client.get(reverse('booking-detail', args=[booking.id]), {'fields': 'compact'})
+        self.assertEqual(list(response.data['flight']), compact_fields)
+        response = self.client.get(reverse('all-flights'), {'fields': 'compact'})
+        self.assertEqual(list(response.data['results'][0]), compact_fields)
+        response = self.client.get(reverse('all-flights'), {'fields': 'price'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_values_fast_path_matches_serializer(self):
+        Flight.objects.create(
+            flight_number='AB101',
+            departure_airport='Lusaka International Airport (LUN)',
+            arrival_airport='Copperbelt International Airport (NLA)',
+            departure_time='2026-01-20T10:00:00.250000Z',
+            arrival_time='2026-01-20T11:00:00Z',
+            price='1199.5',
+            available_seats=150
+        )
+        renderer = JSONRenderer()
+        for serializer_class in (FlightSerializer, CompactFlightSerializer):
+            for zone in ('UTC', 'Africa/Lusaka'):
+                with timezone.override(zone):
+                    fast = ValuesSerializer(serializer_class)
+                    expected = serializer_class(Flight.objects.order_by('id'), many=True).data
+                    rows = fast.many(Flight.objects.order_by('id').values(*fast.columns))
+                    self.assertEqual(renderer.render(rows), renderer.render(expected))
+
     def test_flight_search_by_min_price(self):
         url = reverse('flight-search')
         response = self.client.get(url, {'min_price': 250})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        self.assertIn('AA100', [f['flight_number'] for f in response.data])
-        self.assertIn('UA200', [f['flight_number'] for f in response.data])
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIn('AA100', [f['flight_number'] for f in response.data['results']])
+        self.assertIn('UA200', [f['flight_number'] for f in response.data['results']])
 
     def test_flight_search_by_max_price(self):
         url = reverse('flight-search')
         response = self.client.get(url, {'max_price': 250})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        self.assertIn('UA200', [f['flight_number'] for f in response.data])
-        self.assertIn('DL300', [f['flight_number'] for f in response.data])
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIn('UA200', [f['flight_number'] for f in response.data['results']])
+        self.assertIn('DL300', [f['flight_number'] for f in response.data['results']])
 
     def test_flight_search_by_min_max_price(self):
         url = reverse('flight-search')
         response = self.client.get(url, {'min_price': 200, 'max_price': 250})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        self.assertIn('UA200', [f['flight_number'] for f in response.data])
-        self.assertIn('DL300', [f['flight_number'] for f in response.data])
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIn('UA200', [f['flight_number'] for f in response.data['results']])
+        self.assertIn('DL300', [f['flight_number'] for f in response.data['results']])
 
     def test_flight_search_by_start_date(self):
         url = reverse('flight-search')
         response = self.client.get(url, {'start_date': '2026-01-21'})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        self.assertIn('UA200', [f['flight_number'] for f in response.data])
-        self.assertIn('DL300', [f['flight_number'] for f in response.data])
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIn('UA200', [f['flight_number'] for f in response.data['results']])
+        self.assertIn('DL300', [f['flight_number'] for f in response.data['results']])
 
     def test_flight_search_by_end_date(self):
         url = reverse('flight-search')
         response = self.client.get(url, {'end_date': '2026-01-21'})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        self.assertIn('AA100', [f['flight_number'] for f in response.data])
-        self.assertIn('UA200', [f['flight_number'] for f in response.data])
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIn('AA100', [f['flight_number'] for f in response.data['results']])
+        self.assertIn('UA200', [f['flight_number'] for f in response.data['results']])
 
     def test_flight_search_by_start_end_date(self):
         url = reverse('flight-search')
         response = self.client.get(url, {'start_date': '2026-01-20', 'end_date': '2026-01-21'})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        self.assertIn('AA100', [f['flight_number'] for f in response.data])
-        self.assertIn('UA200', [f['flight_number'] for f in response.data])
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIn('AA100', [f['flight_number'] for f in response.data['results']])
+        self.assertIn('UA200', [f['flight_number'] for f in response.data['results']])
+
+    def test_booking_already_occupied_seat(self):
+        url = reverse('booking-create')
+        response = self.client.post(url, {'flight_id': self.flight2.id, 'seats_reserved': ['1A']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        mail.outbox = []
+        response = self.client.post(url, {'flight_id': self.flight2.id, 'seats_reserved': ['2A', '1A']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('1A', response.data['error'])
+        self.flight2.refresh_from_db()
+        self.assertEqual(self.flight2.available_seats, 99)
+        self.assertEqual(SeatReservation.objects.filter(flight=self.flight2).count(), 1)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_booking_duplicate_seat_in_request(self):
+        url = reverse('booking-create')
+        response = self.client.post(url, {'flight_id': self.flight2.id, 'seats_reserved': ['1A', '1A']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.flight2.refresh_from_db()
+        self.assertEqual(self.flight2.available_seats, 100)
+        self.assertFalse(Booking.objects.filter(flight=self.flight2).exists())
+
+    def test_occupied_seats_view(self):
+        url = reverse('booking-create')
+        self.client.post(url, {'flight_id': self.flight2.id, 'seats_reserved': ['1A', '1B']}, format='json')
+        response = self.client.get(reverse('occupied-seats', args=[self.flight2.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(response.data['occupied']), ['1A', '1B'])
+        self.assertEqual(response.data['held'], [])
+
+    def test_occupied_seats_bitmap_encoding(self):
+        url = reverse('booking-create')
+        self.client.post(url, {'flight_id': self.flight2.id, 'seats_reserved': ['1A', '2B']}, format='json')
+        response = self.client.get(reverse('occupied-seats', args=[self.flight2.id]), {'encoding': 'bitmap'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_seats'], 150)
+        bitmap = base64.b64decode(response.data['bitmap'])
+        self.assertEqual(len(bitmap), 19)
+        # 1A is seat index 0, 2B is seat index 7
+        self.assertEqual(bitmap[0], 0b10000001)
+        self.assertEqual(response.data['unmapped'], [])
+
+    def test_occupied_seats_served_from_cache(self):
+        occupied_url = reverse('occupied-seats', args=[self.flight2.id])
+        self.client.get(occupied_url)
+        with self.assertNumQueries(0):
+            response = self.unauthenticated_client.get(occupied_url)
+        self.assertEqual(response.data, {'occupied': [], 'held': []})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('booking-create'), {'flight_id': self.flight2.id, 'seats_reserved': ['3C']}, format='json')
+        response = self.unauthenticated_client.get(occupied_url)
+        self.assertEqual(response.data, {'occupied': ['3C'], 'held': []})
+
+    def test_occupancy_built_during_a_seat_change_is_not_cached(self):
+        build = occupancy.build_occupancy
+
+        def build_then_book(flight_id):
+            # A booking commits after the seat map was read but before it is cached
+            stale = build(flight_id)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse('booking-create'), {'flight_id': flight_id, 'seats_reserved': ['4D']}, format='json')
+            return stale
+
+        with mock.patch('flights.occupancy.build_occupancy', side_effect=build_then_book):
+            self.assertEqual(occupancy.occupied_seat_list(occupancy.get_occupancy(self.flight2.id)), [])
+        self.assertEqual(occupancy.occupied_seat_list(occupancy.get_occupancy(self.flight2.id)), ['4D'])
+
+    async def test_flight_events_stream(self):
+        response = await self.async_client.get(reverse('flight-events', args=[self.flight2.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        snapshot = (await anext(stream)).decode()
+        self.assertTrue(snapshot.startswith('event: snapshot\n'))
+        self.assertEqual(json.loads(snapshot.split('data: ')[1]), {'status': 'on_time', 'available_seats': 100, 'occupied': [], 'held': []})
+
+        publish_seat_change(self.flight2.id, 99, occupied=['2B'])
+        event = (await anext(stream)).decode()
+        self.assertTrue(event.startswith('event: seats\n'))
+        self.assertEqual(json.loads(event.split('data: ')[1])['occupied'], ['2B'])
+
+        response = await self.async_client.get(reverse('flight-events', args=[999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = await self.async_client.get(reverse('occupied-seats', args=[self.flight2.id]))
+        self.assertEqual(response['X-Seat-Events'], 'live')
+
+    def test_flight_events_not_streamed_under_wsgi(self):
+        # The WSGI handler would drain the endless stream into a list, pinning the worker
+        response = self.unauthenticated_client.get(reverse('flight-events', args=[self.flight2.id]))
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        self.assertFalse(response.streaming)
+        response = self.unauthenticated_client.get(reverse('occupied-seats', args=[self.flight2.id]))
+        self.assertNotIn('X-Seat-Events', response)
+
+    def test_seat_changes_published_on_commit(self):
+        with mock.patch('flights.occupancy.publish_seat_change') as publish:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.client.post(reverse('booking-create'), {'flight_id': self.flight2.id, 'seats_reserved': ['3C']}, format='json')
+            publish.assert_not_called()
+            for callback in callbacks:
+                callback()
+        publish.assert_called_once_with(self.flight2.id, 99, occupied=['3C'], held=(), released=())
+
+        hold = SeatHold.objects.create(user=self.user, flight=self.flight2, seats=['5A'], expires_at=timezone.now())
+        SeatReservation.objects.create(flight=self.flight2, hold=hold, seat='5A')
+        with mock.patch('flights.occupancy.publish_seat_change') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('release_expired_holds', stdout=io.StringIO())
+        publish.assert_called_once_with(self.flight2.id, 100, occupied=(), held=(), released=['5A'])
+
+    def test_seat_hold_converts_to_booking(self):
+        occupied_url = reverse('occupied-seats', args=[self.flight2.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('seat-hold-create'), {'flight_id': self.flight2.id, 'seats': ['4A', '4B']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        hold_id = response.data['id']
+        self.flight2.refresh_from_db()
+        self.assertEqual(self.flight2.available_seats, 98)
+        self.assertEqual(self.unauthenticated_client.get(occupied_url).data, {'occupied': [], 'held': ['4A', '4B']})
+
+        # Held seats cannot be booked or held by anyone else
+        response = self.client.post(reverse('booking-create'), {'flight_id': self.flight2.id, 'seats_reserved': ['4B']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('seat-hold-book', args=[hold_id]), {'payment_status': 'paid'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['seats_reserved'], ['4A', '4B'])
+        self.assertEqual(response.data['payment_status'], 'paid')
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertEqual(SeatReservation.objects.filter(booking_id=response.data['id']).count(), 2)
+        self.flight2.refresh_from_db()
+        self.assertEqual(self.flight2.available_seats, 98)
+        self.assertEqual(self.unauthenticated_client.get(occupied_url).data, {'occupied': ['4A', '4B'], 'held': []})
+        self.assertEqual(OutgoingEmail.objects.filter(status='pending').count(), 1)
+
+    def test_expired_seat_holds_are_released(self):
+        response = self.client.post(reverse('seat-hold-create'), {'flight_id': self.flight2.id, 'seats': ['5A']}, format='json')
+        hold_id = response.data['id']
+        SeatHold.objects.filter(pk=hold_id).update(expires_at=timezone.now())
+        response = self.client.post(reverse('seat-hold-book', args=[hold_id]), {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.flight2.refresh_from_db()
+        self.assertEqual(self.flight2.available_seats, 100)
+        self.assertFalse(SeatReservation.objects.exists())
+
+        response = self.client.post(reverse('seat-hold-create'), {'flight_id': self.flight2.id, 'seats': ['5A', '5B']}, format='json')
+        SeatHold.objects.update(expires_at=timezone.now())
+        out = io.StringIO()
+        call_command('release_expired_holds', stdout=out)
+        self.assertIn('Released 1 expired hold(s).', out.getvalue())
+        self.flight2.refresh_from_db()
+        self.assertEqual(self.flight2.available_seats, 100)
+        self.assertFalse(SeatReservation.objects.exists())
+
+        # An expired hold that has not been swept yet does not block a new booking
+        self.client.post(reverse('seat-hold-create'), {'flight_id': self.flight2.id, 'seats': ['6A']}, format='json')
+        SeatHold.objects.update(expires_at=timezone.now())
+        response = self.client.post(reverse('booking-create'), {'flight_id': self.flight2.id, 'seats_reserved': ['6A']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.flight2.refresh_from_db()
+        self.assertEqual(self.flight2.available_seats, 99)
+
+    def test_seat_hold_release_by_owner(self):
+        response = self.client.post(reverse('seat-hold-create'), {'flight_id': self.flight1.id, 'seats': ['1A']}, format='json')
+        hold_url = reverse('seat-hold-detail', args=[response.data['id']])
+        self.flight1.refresh_from_db()
+        self.assertEqual(self.flight1.available_seats, 0)
+        other = User.objects.create_user(username='other', password='otherpassword', approval_status='approved')
+        other_client = APIClient()
+        other_client.force_authenticate(other)
+        self.assertEqual(other_client.delete(hold_url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.delete(hold_url).status_code, status.HTTP_204_NO_CONTENT)
+        self.flight1.refresh_from_db()
+        self.assertEqual(self.flight1.available_seats, 1)
+
+    def test_conditional_get_for_flight_and_seat_endpoints(self):
+        urls = [reverse('flight-detail', args=[self.flight2.id]), reverse('all-flights'), reverse('occupied-seats', args=[self.flight2.id])]
+        for row, url in enumerate(urls, start=7):
+            response = self.unauthenticated_client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            etag = response['ETag']
+            response = self.unauthenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response.content, b'')
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse('booking-create'), {'flight_id': self.flight2.id, 'seats_reserved': [f'{row}A']}, format='json')
+            response = self.unauthenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response['ETag'], etag)
+
+        # Deleting a flight leaves the newest updated_at alone but still changes the list
+        flights_url = reverse('all-flights')
+        response = self.unauthenticated_client.get(flights_url)
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        self.flight3.delete()
+        response = self.unauthenticated_client.get(flights_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('DL300', [flight['flight_number'] for flight in response.data['results']])
+
+        # Polling the seat map is answered from the cache without touching bookings
+        occupied_url = reverse('occupied-seats', args=[self.flight2.id])
+        etag = self.unauthenticated_client.get(occupied_url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.unauthenticated_client.get(occupied_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        detail_url = reverse('flight-detail', args=[self.flight1.id])
+        response = self.unauthenticated_client.get(detail_url)
+        self.assertIn('Last-Modified', response)
+        self.assertNotEqual(self.unauthenticated_client.get(detail_url, {'fields': 'compact'})['ETag'], response['ETag'])
+        self.flight1.status = 'delayed'
+        self.flight1.save(update_fields=['status'])
+        response = self.unauthenticated_client.get(detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.data['status'], 'delayed')
+
+    def test_admin_views_check_the_current_user_row(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {MyTokenObtainPairSerializer.get_token(self.admin).access_token}')
+        url = reverse('admin-pending-users')
+        self.assertEqual(client.get(url).status_code, status.HTTP_200_OK)
+        # The token still claims is_admin, but the demotion applies at once
+        User.objects.filter(pk=self.admin.pk).update(is_staff=False)
+        self.assertEqual(client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        User.objects.filter(pk=self.admin.pk).update(is_active=False)
+        self.assertEqual(client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_approve_user_queues_email(self):
+        pending = User.objects.create_user(username='pending', password='pendingpassword', email='pending@example.com')
+        response = self.admin_client.patch(reverse('admin-approve-user', args=[pending.id]), {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        pending.refresh_from_db()
+        self.assertEqual(pending.approval_status, 'approved')
+        self.assertEqual(len(mail.outbox), 0)
+        call_command('send_queued_emails', stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['pending@example.com'])
+        self.assertEqual(OutgoingEmail.objects.get().status, 'sent')
+
+    def test_bulk_user_approval(self):
+        now = timezone.now()
+        pending = [
+            User.objects.create_user(
+                username=f'signup{i}', password='signuppassword', email=f'signup{i}@{"promo" if i % 2 else "example"}.com',
+                date_joined=now - timedelta(days=10 - i),
+            )
+            for i in range(6)
+        ]
+
+        response = self.admin_client.get(reverse('admin-pending-users'), {'page_size': 4})
+        self.assertEqual([user['username'] for user in response.data['results']], ['signup0', 'signup1', 'signup2', 'signup3'])
+        response = self.admin_client.get(response.data['next'])
+        self.assertEqual([user['username'] for user in response.data['results']], ['signup4', 'signup5'])
+
+        url = reverse('admin-bulk-user-approval')
+        response = self.admin_client.post(url, {'approval_status': 'approved', 'joined_after': now.isoformat()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.admin_client.post(url, {'approval_status': 'pending', 'user_ids': [pending[0].id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # SELECT ... FOR UPDATE, UPDATE, one outbox INSERT and the remaining count (plus a savepoint pair), however many users match
+        with self.assertNumQueries(6):
+            response = self.admin_client.post(url, {
+                'approval_status': 'rejected', 'joined_before': (now - timedelta(days=5)).isoformat(), 'email_domain': 'promo.com',
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(response.data['user_ids'], [pending[1].id, pending[3].id])
+        self.assertEqual(response.data['remaining'], 0)
+
+        response = self.admin_client.post(url, {'approval_status': 'approved', 'user_ids': [pending[0].id, pending[1].id, self.admin.id]}, format='json')
+        self.assertEqual(response.data['user_ids'], [pending[0].id, pending[1].id])
+        self.assertEqual(
+            dict(User.objects.filter(username__startswith='signup').values_list('username', 'approval_status')),
+            {'signup0': 'approved', 'signup1': 'approved', 'signup2': 'pending', 'signup3': 'rejected', 'signup4': 'pending', 'signup5': 'pending'},
+        )
+
+        # Users without an email address are updated but not emailed
+        self.assertEqual(OutgoingEmail.objects.count(), 4)
+        call_command('send_queued_emails', stdout=io.StringIO())
+        self.assertEqual(
+            sorted((message.to[0], message.subject) for message in mail.outbox),
+            [
+                ('signup0@example.com', 'Your AirBooking Account Has Been Approved!'),
+                ('signup1@promo.com', 'Your AirBooking Account Application'),
+                ('signup1@promo.com', 'Your AirBooking Account Has Been Approved!'),
+                ('signup3@promo.com', 'Your AirBooking Account Application'),
+            ],
+        )
+
+    def test_request_metrics(self):
+        metrics_registry.reset()
+        self.client.get(reverse('flight-search'), {'departure_airport': 'JFK'})
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            response = self.client.post(reverse('booking-create'), {'flight_id': self.flight1.id, 'seats_reserved': ['1A']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.get('/api/no-such-page/')
+
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+        response = self.admin_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        samples = dict(line.rsplit(' ', 1) for line in response.content.decode().splitlines() if not line.startswith('#'))
+
+        self.assertEqual(samples['airbooking_http_requests_total{view="flight-search",method="GET",status="200"}'], '1')
+        self.assertEqual(samples['airbooking_http_requests_total{view="booking-create",method="POST",status="201"}'], '1')
+        self.assertEqual(samples['airbooking_http_requests_total{view="unmatched",method="GET",status="404"}'], '1')
+        self.assertEqual(samples['airbooking_http_requests_total{view="metrics",method="GET",status="403"}'], '1')
+        self.assertEqual(samples['airbooking_http_request_duration_seconds_bucket{view="booking-create",le="+Inf"}'], '1')
+        self.assertEqual(samples['airbooking_http_request_duration_seconds_count{view="booking-create"}'], '1')
+        self.assertEqual(int(samples['airbooking_db_queries_total{view="booking-create"}']), len(queries))
+        for metric in ('db_query', 'serializer', 'email'):
+            self.assertGreater(float(samples[f'airbooking_{metric}_seconds_total{{view="booking-create"}}']), 0)
+        self.assertEqual(float(samples['airbooking_email_seconds_total{view="flight-search"}']), 0)
+
+    def test_outbox_retries_with_backoff(self):
+        email = OutgoingEmail.objects.create(subject='Hello', body='Body', from_email='admin@airbooking.com', recipients=['a@example.com'])
+        with mock.patch('django.core.mail.EmailMessage.send', side_effect=OSError('SMTP down')):
+            call_command('send_queued_emails', stdout=io.StringIO())
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'pending')
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.last_error, 'SMTP down')
+        self.assertGreater(email.next_attempt_at, email.created_at)
+
+        # Not due yet, so the worker leaves it alone
+        call_command('send_queued_emails', stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+
+        OutgoingEmail.objects.filter(pk=email.pk).update(next_attempt_at=email.created_at, attempts=4)
+        with mock.patch('django.core.mail.EmailMessage.send', side_effect=OSError('SMTP down')):
+            call_command('send_queued_emails', stdout=io.StringIO())
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'failed')
+        self.assertEqual(email.attempts, 5)
+
+    def test_outbox_backs_off_when_smtp_connection_fails(self):
+        emails = [
+            OutgoingEmail.objects.create(subject='Hello', body='Body', from_email='admin@airbooking.com', recipients=[f'{name}@example.com'])
+            for name in ('a', 'b')
+        ]
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.open', side_effect=OSError('Connection refused')):
+            call_command('send_queued_emails', stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts, email.last_error), ('pending', 1, 'Connection refused'))
+            self.assertGreater(email.next_attempt_at, email.created_at)
+
+    def test_outbox_sends_outside_a_transaction(self):
+        email = OutgoingEmail.objects.create(subject='Hello', body='Body', from_email='admin@airbooking.com', recipients=['a@example.com'])
+        depth = len(connection.atomic_blocks)
+        during_send = []
+
+        def send(message, fail_silently=False):
+            # The batch is already leased, and no transaction holds the database while SMTP runs
+            during_send.append((len(connection.atomic_blocks), OutgoingEmail.objects.filter(next_attempt_at__lte=timezone.now()).exists()))
+            return 1
+
+        with mock.patch('django.core.mail.EmailMessage.send', send):
+            self.assertEqual(deliver_batch(), (1, 0))
+        self.assertEqual(during_send, [(depth, False)])
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('sent', 1))
+
+    def test_generate_schedule(self):
+        with self.assertRaises(CommandError):
+            call_command('generate_schedule', stdout=io.StringIO())
+        options = {'airports': 5, 'routes': 8, 'days': 3, 'users': 10, 'total_seats': 30, 'chunk_size': 7, 'start': '2026-03-01', 'append': True}
+        call_command('generate_schedule', stdout=io.StringIO(), **options)
+        flights = Flight.objects.filter(flight_number__startswith='GS')
+        self.assertGreaterEqual(flights.count(), 8 * 3)
+        self.assertFalse(flights.filter(origin=None).exists())
+        for flight in flights:
+            self.assertEqual(flight.available_seats, flight.total_seats - flight.seat_reservations.count())
+        schedule = list(flights.order_by('id').values_list('flight_number', 'departure_time', 'available_seats'))
+        seats = list(SeatReservation.objects.filter(flight__in=flights).order_by('id').values_list('seat', flat=True))
+
+        # Same seed and options reproduce the same schedule, reusing the users the first run created
+        flights.delete()
+        User.objects.filter(username='load1_9').delete()
+        call_command('generate_schedule', stdout=io.StringIO(), **options)
+        self.assertEqual(User.objects.filter(username__startswith='load1_').count(), 10)
+        flights = Flight.objects.filter(flight_number__startswith='GS')
+        self.assertEqual(list(flights.order_by('id').values_list('flight_number', 'departure_time', 'available_seats')), schedule)
+        self.assertEqual(list(SeatReservation.objects.filter(flight__in=flights).order_by('id').values_list('seat', flat=True)), seats)
+
+    def test_benchmark_api_reports_each_endpoint(self):
+        out = io.StringIO()
+        call_command('benchmark_api', requests=4, concurrency=1, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(list(report['endpoints']), ['search', 'all-flights', 'occupied-seats', 'booking-create', 'my-trips'])
+        for result in report['endpoints'].values():
+            self.assertEqual(sum(result['status_codes'].values()), 4)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['queries_per_request'], 0)
+        self.assertEqual(report['endpoints']['all-flights']['status_codes'], {'200': 4})
+
+    def test_parse_airport_code(self):
+        self.assertEqual(parse_airport_code('Lusaka International Airport (LUN)'), 'LUN')
+        self.assertEqual(parse_airport_code('Livingstone (Harry Mwanga Nkumbula) (LVI)'), 'LVI')
+        self.assertEqual(parse_airport_code('JFK'), 'JFK')
+        self.assertEqual(parse_airport_code('Lusaka'), '')
+        self.assertEqual(self.flight1.departure_code, 'JFK')
+
+    def test_flight_search_by_airport_name_uses_code(self):
+        Flight.objects.create(
+            flight_number='AB101',
+            departure_airport='Lusaka International Airport (LUN)',
+            arrival_airport='Copperbelt International Airport (NLA)',
+            departure_time='2026-01-20T10:00:00Z',
+            arrival_time='2026-01-20T11:00:00Z',
+            price=1200.00,
+            available_seats=150
+        )
+        url = reverse('flight-search')
+        response = self.client.get(url, {'departure_airport': 'Lusaka International Airport (LUN)', 'arrival_airport': 'NLA'})
+        self.assertEqual([f['flight_number'] for f in response.data['results']], ['AB101'])
+        # Free text still matches on the airport name
+        response = self.client.get(url, {'departure_airport': 'lusaka'})
+        self.assertEqual([f['flight_number'] for f in response.data['results']], ['AB101'])
+
+    def test_flight_search_served_from_cache(self):
+        url = reverse('flight-search')
+        params = {'departure_airport': 'JFK', 'arrival_airport': 'LAX', 'departure_date': '2026-01-20'}
+        response = self.unauthenticated_client.get(url, params)
+        self.assertEqual([f['flight_number'] for f in response.data['results']], ['AA100'])
+        # Equivalent spellings of the same search share the cached page
+        with self.assertNumQueries(0):
+            response = self.unauthenticated_client.get(url, {'departure_airport': 'New York (JFK)', 'arrival_airport': 'LAX', 'departure_date': '2026-1-20'})
+        self.assertEqual(response.data['results'][0]['available_seats'], 1)
+
+        # A booking on another route leaves the page cached
+        self.client.post(reverse('seat-hold-create'), {'flight_id': self.flight2.id, 'seats': ['1A']}, format='json')
+        with self.assertNumQueries(0):
+            self.unauthenticated_client.get(url, params)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('booking-create'), {'flight_id': self.flight1.id, 'seats_reserved': ['1A']}, format='json')
+        response = self.unauthenticated_client.get(url, params)
+        self.assertEqual(response.data['results'][0]['available_seats'], 0)
+
+        self.unauthenticated_client.get(url, {'departure_airport': 'JFK'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin_client.patch(reverse('admin-flight-status-update', args=[self.flight3.id]), {'status': 'delayed'}, format='json')
+        response = self.unauthenticated_client.get(url, {'departure_airport': 'JFK'})
+        self.assertEqual([f['status'] for f in response.data['results']], ['on_time', 'delayed'])
+
+    @override_settings(ROUTE_GRAPH_REFRESH_INTERVAL=0)
+    def test_flight_connections(self):
+        def add(number, departure, arrival, leaves, lands, price):
+            return Flight.objects.create(
+                flight_number=number, departure_airport=departure, arrival_airport=arrival,
+                departure_time=f'2026-01-20T{leaves}:00Z', arrival_time=f'2026-01-20T{lands}:00Z', price=price, available_seats=10,
+            )
+        add('CX1', 'LAX', 'ORD', '14:30', '18:30', 150)
+        add('CX2', 'LAX', 'ORD', '13:20', '17:20', 100)  # 20 minute layover, too short
+        add('CX3', 'JFK', 'ORD', '09:00', '11:00', 600)
+        add('CX4', 'LAX', 'DEN', '14:00', '16:00', 50)
+        denver = add('CX5', 'DEN', 'ORD', '17:00', '19:00', 50)
+        url = reverse('flight-connections')
+        params = {'departure_airport': 'JFK', 'arrival_airport': 'ORD', 'departure_date': '2026-01-20'}
+
+        response = self.unauthenticated_client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        itineraries = [[f['flight_number'] for f in result['flights']] for result in response.data['results']]
+        self.assertEqual(itineraries, [['AA100', 'CX4', 'CX5'], ['AA100', 'CX1'], ['CX3']])
+        first = response.data['results'][0]
+        self.assertEqual((first['stops'], first['price'], first['duration_minutes']), (2, '400.00', 540))
+
+        response = self.unauthenticated_client.get(url, {**params, 'sort_by': 'duration', 'max_stops': 1})
+        itineraries = [[f['flight_number'] for f in result['flights']] for result in response.data['results']]
+        self.assertEqual(itineraries, [['CX3'], ['AA100', 'CX1']])
+
+        # Changes reach the graph without a rebuild per query
+        denver.status = 'cancelled'
+        denver.save()
+        response = self.unauthenticated_client.get(url, params)
+        self.assertEqual(response.data['count'], 2)
+        Flight.objects.filter(flight_number='CX3').delete()
+        response = self.unauthenticated_client.get(url, params)
+        self.assertEqual(response.data['count'], 1)
+        response = self.unauthenticated_client.get(url, {**params, 'seats': 2})
+        self.assertEqual(response.data['count'], 0)
+
+        self.assertEqual(self.unauthenticated_client.get(url, {**params, 'max_stops': 3}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.unauthenticated_client.get(url, {**params, 'arrival_airport': 'Chicago'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_fare_calendar(self):
+        call_command('rebuild_fare_calendar', stdout=io.StringIO())
+        url = reverse('fare-calendar')
+        params = {'from': 'JFK', 'to': 'LAX', 'month': '2026-01'}
+        with self.assertNumQueries(1):
+            response = self.unauthenticated_client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['days']), 31)
+        self.assertEqual(response.data['days'][19], {'date': '2026-01-20', 'min_price': '300.00', 'available_flights': 1, 'available': True})
+        self.assertEqual(response.data['days'][20]['min_price'], None)
+
+        # Selling out the only flight that day empties it
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('booking-create'), {'flight_id': self.flight1.id, 'seats_reserved': ['1A']}, format='json')
+        day = self.unauthenticated_client.get(url, params).data['days'][19]
+        self.assertEqual((day['min_price'], day['available']), (None, False))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.admin_client.post(reverse('admin-flight-management'), {
+                'flight_number': 'AA101', 'departure_airport': 'JFK', 'arrival_airport': 'LAX',
+                'departure_time': '2026-01-20T18:00:00Z', 'arrival_time': '2026-01-20T21:00:00Z',
+                'price': '275.00', 'available_seats': 5,
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        day = self.unauthenticated_client.get(url, params).data['days'][19]
+        self.assertEqual((day['min_price'], day['available_flights']), ('275.00', 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin_client.patch(reverse('admin-flight-status-update', args=[response.data['id']]), {'price': '199.00'}, format='json')
+        self.assertEqual(self.unauthenticated_client.get(url, params).data['days'][19]['min_price'], '199.00')
+
+        response = self.unauthenticated_client.get(url, {**params, 'month': '2026-13'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['month'], 'Enter a valid date in YYYY-MM format.')
+
+    def test_admin_booking_export_streams(self):
+        self.client.post(reverse('booking-create'), {'flight_id': self.flight2.id, 'seats_reserved': ['1A', '1B']}, format='json')
+        self.client.post(reverse('booking-create'), {'flight_id': self.flight1.id, 'seats_reserved': ['1A'], 'payment_status': 'paid'}, format='json')
+        url = reverse('admin-booking-export')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.admin_client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:4], ['booking_id', 'booking_time', 'payment_status', 'seats'])
+        self.assertEqual([line.split(',')[3] for line in lines[1:]], ['1A 1B', '1A'])
+
+        response = self.admin_client.get(url, {'output': 'ndjson', 'payment_status': 'paid'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(row['flight_number'], row['seats']) for row in rows], [('AA100', ['1A'])])
+        self.assertEqual(self.admin_client.get(url, {'output': 'xml'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.admin_client.get(url, {'start_date': 'yesterday'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.admin_client.get(reverse('admin-flight-manifest', args=[self.flight2.id]))
+        self.assertIn('manifest-UA200', response['Content-Disposition'])
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([(line.split(',')[0], line.split(',')[2]) for line in lines[1:]], [('1A', 'testuser'), ('1B', 'testuser')])
+
+    def test_admin_flight_import(self):
+        url = reverse('admin-flight-import')
+        row = {
+            'flight_number': 'ZZ1', 'departure_airport': 'JFK', 'arrival_airport': 'LAX',
+            'departure_time': '2026-02-01T10:00:00Z', 'arrival_time': '2026-02-01T13:00:00Z', 'price': '120.00', 'available_seats': 100,
+        }
+        rows = [
+            row,
+            {**row, 'departure_time': '2026-02-01T18:00:00Z', 'arrival_time': '2026-02-01T21:00:00Z'},
+            {**row, 'flight_number': 'ZZ2', 'arrival_time': '2026-02-01T09:00:00Z'},
+            {**row, 'flight_number': 'ZZ3', 'available_seats': 200},
+            {**row, 'flight_number': 'ZZ4', 'price': 'free'},
+            {**row, 'flight_number': 'AA100', 'departure_time': '2026-01-20T18:00:00Z', 'arrival_time': '2026-01-20T21:00:00Z'},
+            {**row, 'flight_number': 'ZZ5', 'departure_time': '2026-02-02T10:00:00Z', 'arrival_time': '2026-02-02T13:00:00Z'},
+        ]
+        response = self.admin_client.post(url, rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['created'], response.data['updated']), (2, 0))
+        self.assertEqual({error['row']: list(error['errors']) for error in response.data['errors']}, {
+            2: ['flight_number'], 3: ['arrival_time'], 4: ['available_seats'], 5: ['price'], 6: ['flight_number'],
+        })
+        imported = Flight.objects.get(flight_number='ZZ1')
+        self.assertEqual((imported.departure_code, imported.origin.code), ('JFK', 'JFK'))
+
+        # Upsert by flight_number and departure_time, from a CSV body; sold seats stay sold
+        Flight.objects.filter(pk=imported.pk).update(available_seats=90)
+        body = 'flight_number,departure_airport,arrival_airport,departure_time,arrival_time,price,available_seats,total_seats\n'
+        body += 'ZZ1,JFK,LAX,2026-02-01T10:00:00Z,2026-02-01T14:00:00Z,99.00,160,160\n'
+        response = self.admin_client.post(f'{url}?upsert=1', body, content_type='text/csv')
+        self.assertEqual((response.data['created'], response.data['updated'], response.data['errors']), (0, 1, []))
+        imported.refresh_from_db()
+        self.assertEqual((str(imported.price), imported.total_seats, imported.available_seats), ('99.00', 160, 100))
+        self.assertEqual(imported.arrival_time.hour, 14)
+
+        response = self.admin_client.post(url, {'flight_number': 'ZZ9'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(url, rows, format='json').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_flight_disruption(self):
+        other = User.objects.create_user(username='other', password='otherpassword', email='other@example.com', approval_status='approved')
+        Booking.objects.create(user=self.user, flight=self.flight1, seats_reserved=['1A'])
+        Booking.objects.create(user=self.user, flight=self.flight3, seats_reserved=['2A'])
+        Booking.objects.create(user=other, flight=self.flight3, seats_reserved=['2B'])
+        Booking.objects.create(user=other, flight=self.flight2, seats_reserved=['3A'])
+        no_email = User.objects.create_user(username='noemail', password='noemailpassword', approval_status='approved')
+        Booking.objects.create(user=no_email, flight=self.flight3, seats_reserved=['2C'])
+        url = reverse('admin-bulk-flight-status')
+
+        # Everything leaving JFK that morning
+        # Select, one UPDATE and the notice, however many flights and bookings are involved
+        with self.assertNumQueries(5), self.captureOnCommitCallbacks():
+            response = self.admin_client.post(url, {
+                'status': 'cancelled', 'airport': 'JFK', 'start': '2026-01-20T00:00:00Z', 'end': '2026-01-23T00:00:00Z',
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['flight_ids'], [self.flight1.id, self.flight3.id])
+        self.assertEqual(set(Flight.objects.filter(status='cancelled').values_list('flight_number', flat=True)), {'AA100', 'DL300'})
+        # Nothing is emailed until the worker fans the notice out
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+        call_command('send_queued_emails', stdout=io.StringIO())
+        # The passenger without an email address is neither emailed nor counted
+        self.assertEqual(DisruptionNotice.objects.get().emails_queued, 2)
+        self.assertEqual(OutgoingEmail.objects.count(), 2)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['other@example.com', 'test@example.com'])
+        message = next(message for message in mail.outbox if message.to == ['test@example.com'])
+        self.assertIn('cancelled', message.subject)
+        self.assertIn('AA100', message.body)
+        self.assertIn('DL300', message.body)
+
+        # Flights already in the requested status are left alone
+        response = self.admin_client.post(url, {'status': 'cancelled', 'flight_ids': [self.flight1.id, self.flight2.id]}, format='json')
+        self.assertEqual((response.data['flight_ids'], DisruptionNotice.objects.count()), ([self.flight2.id], 2))
+        response = self.admin_client.post(url, {'status': 'delayed', 'flight_ids': [self.flight1.id], 'airport': 'JFK'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(url, {'status': 'delayed', 'flight_ids': [self.flight1.id]}, format='json').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_flight_search_invalid_date(self):
+        url = reverse('flight-search')
+        response = self.client.get(url, {'departure_date': '2026-13-40'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def collect_pages(self, url, params):
+        numbers = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            numbers.extend(f['flight_number'] for f in response.data['results'])
+            if not response.data['next']:
+                return numbers, response
+            response = self.client.get(response.data['next'])
+
+    def test_all_flights_keyset_pagination(self):
+        for i in range(4):
+            Flight.objects.create(
+                flight_number=f'EX{i}',
+                departure_airport='JFK',
+                arrival_airport='LAX',
+                # Same departure time for all, so pages are split on the id tie-breaker
+                departure_time='2026-01-25T10:00:00Z',
+                arrival_time='2026-01-25T13:00:00Z',
+                price=100.00,
+                available_seats=10
+            )
+        numbers, last_page = self.collect_pages(reverse('all-flights'), {'page_size': 2})
+        self.assertEqual(numbers, ['AA100', 'UA200', 'DL300', 'EX0', 'EX1', 'EX2', 'EX3'])
+        self.assertIsNotNone(last_page.data['previous'])
+        response = self.client.get(last_page.data['previous'])
+        self.assertEqual([f['flight_number'] for f in response.data['results']], ['EX1', 'EX2'])
+
+    def test_flight_search_pagination_follows_sort(self):
+        url = reverse('flight-search')
+        numbers, _ = self.collect_pages(url, {'sort_by': 'price', 'sort_order': 'desc', 'page_size': 1})
+        self.assertEqual(numbers, ['AA100', 'UA200', 'DL300'])
+        numbers, _ = self.collect_pages(url, {'sort_by': 'price', 'page_size': 2})
+        self.assertEqual(numbers, ['DL300', 'UA200', 'AA100'])
+
+    def test_flight_search_invalid_sort_and_cursor(self):
+        url = reverse('flight-search')
+        self.assertEqual(self.client.get(url, {'sort_by': 'password'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'cursor': 'garbage'}).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConcurrentBookingTests(APITransactionTestCase):
+    def test_concurrent_bookings_keep_seat_count_consistent(self):
+        cache.clear()
+        users = [
+            User.objects.create_user(username=f'racer{i}', password='racerpassword', approval_status='approved')
+            for i in range(12)
+        ]
+        flight = Flight.objects.create(
+            flight_number='RC100',
+            departure_airport='JFK',
+            arrival_airport='LAX',
+            departure_time='2026-01-20T10:00:00Z',
+            arrival_time='2026-01-20T13:00:00Z',
+            price=300.00,
+            available_seats=5,
+            total_seats=5
+        )
+        barrier = threading.Barrier(len(users))
+        status_codes = []
+
+        def book(user, seats):
+            client = APIClient(raise_request_exception=False)
+            client.force_authenticate(user)
+            try:
+                barrier.wait()
+                response = client.post(reverse('booking-create'), {'flight_id': flight.id, 'seats_reserved': seats}, format='json')
+                status_codes.append(response.status_code)
+            finally:
+                connection.close()
+
+        # Overlapping two-seat requests for a five-seat flight
+        threads = [
+            threading.Thread(target=book, args=(user, [f'1{"ABCDEF"[i % 6]}', f'2{"ABCDEF"[i % 3]}']))
+            for i, user in enumerate(users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        flight.refresh_from_db()
+        reserved = SeatReservation.objects.filter(flight=flight).count()
+        self.assertEqual(len(status_codes), len(users))
+        # Every request either books or is turned away cleanly; none fail on a database lock
+        self.assertEqual(set(status_codes) - {status.HTTP_201_CREATED, status.HTTP_400_BAD_REQUEST}, set(), status_codes)
+        self.assertEqual(flight.available_seats, flight.total_seats - reserved)
+        self.assertEqual(status_codes.count(status.HTTP_201_CREATED), Booking.objects.filter(flight=flight).count())
+        self.assertEqual(reserved, 2 * status_codes.count(status.HTTP_201_CREATED))
+        self.assertLessEqual(reserved, flight.total_seats)
+
+# Every API endpoint with the most queries one request may run. Each entry is
+# (url name, method, client, budget, request), where request(data) returns the
+# URL args and the payload for a dataset built by EndpointQueryBudgetTests.
+# Budgets count savepoints and the request's on_commit work too.
+# Admin views read the user row to authenticate; passenger views build it from the token.
+ENDPOINT_QUERY_BUDGETS = [
+    ('flight-search', 'get', 'anonymous', 1, lambda d: ([], {'departure_airport': 'JFK', 'arrival_airport': 'LAX', 'departure_date': d.day})),
+    ('flight-connections', 'get', 'anonymous', 2, lambda d: ([], {'departure_airport': 'JFK', 'arrival_airport': 'ORD', 'departure_date': d.day})),
+    ('flight-detail', 'get', 'anonymous', 1, lambda d: ([d.flight.pk], {})),
+    ('booking-create', 'post', 'user', 13, lambda d: ([], {'flight_id': d.flight.pk, 'seats_reserved': ['30A', '30B']})),
+    ('itinerary-booking', 'post', 'user', 19, lambda d: ([], {'segments': [
+        {'flight_id': d.flight.pk, 'seats_reserved': ['30A']},
+        {'flight_id': d.connection.pk, 'seats_reserved': ['30A']},
+    ]})),
+    ('user-bookings', 'get', 'user', 1, lambda d: ([], {})),
+    ('booking-detail', 'get', 'user', 1, lambda d: ([d.booking.pk], {})),
+    ('seat-hold-create', 'post', 'user', 11, lambda d: ([], {'flight_id': d.flight.pk, 'seats': ['31A']})),
+    ('seat-hold-detail', 'delete', 'user', 9, lambda d: ([d.hold.pk], {})),
+    ('seat-hold-book', 'post', 'user', 11, lambda d: ([d.hold.pk], {})),
+    ('admin-pending-users', 'get', 'admin', 2, lambda d: ([], {})),
+    ('admin-approve-user', 'patch', 'admin', 10, lambda d: ([d.pending.pk], {})),
+    ('admin-bulk-user-approval', 'post', 'admin', 7, lambda d: ([], {'approval_status': 'approved', 'joined_before': timezone.now().isoformat()})),
+    ('admin-flight-management', 'get', 'admin', 2, lambda d: ([], {})),
+    ('admin-flight-management', 'post', 'admin', 5, lambda d: ([], dict(d.new_flight, flight_number='ZZ900'))),
+    ('admin-bulk-flight-status', 'post', 'admin', 8, lambda d: ([], {'status': 'delayed', 'airport': 'JFK', 'start': d.start.isoformat(), 'end': d.end.isoformat()})),
+    ('admin-flight-import', 'post', 'admin', 8, lambda d: ([], [dict(d.new_flight, flight_number=f'ZZ90{i}') for i in range(3)])),
+    ('admin-flight-status-update', 'patch', 'admin', 6, lambda d: ([d.flight.pk], {'status': 'cancelled'})),
+    ('fare-calendar', 'get', 'anonymous', 1, lambda d: ([], {'from': 'JFK', 'to': 'LAX', 'month': d.day[:7]})),
+    ('admin-booking-export', 'get', 'admin', 2, lambda d: ([], {})),
+    ('admin-flight-manifest', 'get', 'admin', 3, lambda d: ([d.flight.pk], {})),
+    ('airport-list', 'get', 'anonymous', 1, lambda d: ([], {})),
+    ('all-flights', 'get', 'anonymous', 2, lambda d: ([], {})),
+    ('occupied-seats', 'get', 'anonymous', 2, lambda d: ([d.flight.pk], {})),
+    ('register', 'post', 'anonymous', 2, lambda d: ([], {'username': 'newcomer', 'password': 'newcomerpassword', 'email': 'newcomer@example.com'})),
+    ('token_obtain_pair', 'post', 'anonymous', 1, lambda d: ([], {'username': 'traveller', 'password': 'travellerpassword'})),
+    ('token_refresh', 'post', 'anonymous', 1, lambda d: ([], {'refresh': d.refresh})),
+    ('metrics', 'get', 'admin', 1, lambda d: ([], {})),
+]
+
+# Endpoints the budget table leaves out, and why
+QUERY_BUDGET_EXEMPT = {
+    'flight-events': 'An open-ended event stream; its snapshot comes from the cached occupancy that occupied-seats covers.',
+}
+
+
+@override_settings(ROUTE_GRAPH_REFRESH_INTERVAL=0)
+class EndpointQueryBudgetTests(APITestCase):
+    # Data that grows per scale step: flights per route, bookings, passengers and pending users
+    SCALES = (1, 5)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.password = make_password('travellerpassword')
+
+    def build_dataset(self, scale):
+        start = timezone.make_aware(datetime.combine(timezone.localdate() + timedelta(days=30), time.min))
+        flights = []
+        for i in range(3 * scale):
+            for number, departure, arrival, leaves in (('AA', 'JFK', 'LAX', 6), ('UA', 'LAX', 'ORD', 13), ('DL', 'JFK', 'MIA', 8)):
+                departure_time = start + timedelta(hours=leaves, minutes=5 * i)
+                flights.append(Flight(
+                    flight_number=f'{number}{100 + i}', departure_airport=departure, arrival_airport=arrival,
+                    departure_time=departure_time, arrival_time=departure_time + timedelta(hours=3),
+                    price=200 + i, available_seats=150,
+                ))
+        Flight.objects.bulk_create(Flight.link_airports(flights))
+        flight, onward = flights[0], flights[1]
+
+        traveller = User.objects.create(username='traveller', email='traveller@example.com', password=self.password, approval_status='approved')
+        admin = User.objects.create(username='admin', email='admin@example.com', password=self.password, is_staff=True, approval_status='approved')
+        passengers = User.objects.bulk_create([
+            User(username=f'passenger{i}', email=f'passenger{i}@example.com', password=self.password, approval_status='approved')
+            for i in range(2 * scale)
+        ])
+        User.objects.bulk_create([
+            User(username=f'signup{i}', email=f'signup{i}@example.com', password=self.password)
+            for i in range(2 * scale)
+        ])
+
+        # Passengers fill the first flight and the traveller has one booking per flight on the first route
+        bookings = [Booking(user=passenger, flight=flight, seats_reserved=[seat_label(i)]) for i, passenger in enumerate(passengers)]
+        bookings += [Booking(user=traveller, flight=other, seats_reserved=['1A']) for other in flights[3::3]]
+        Booking.objects.bulk_create(bookings)
+        hold = SeatHold.objects.create(user=traveller, flight=flight, seats=['20A', '20B'], expires_at=timezone.now() + timedelta(minutes=10))
+        SeatReservation.objects.bulk_create(
+            [SeatReservation(flight=booking.flight, booking=booking, seat=booking.seats_reserved[0]) for booking in bookings]
+            + [SeatReservation(flight=flight, hold=hold, seat=seat) for seat in hold.seats]
+        )
+        Flight.objects.filter(pk=flight.pk).update(available_seats=150 - len(passengers) - len(hold.seats))
+        for other in flights[3::3]:
+            Flight.objects.filter(pk=other.pk).update(available_seats=149)
+        rebuild_fares()
+
+        return SimpleNamespace(
+            start=start, end=start + timedelta(days=1), day=start.date().isoformat(),
+            flight=flight, connection=onward, booking=bookings[-1], hold=hold,
+            pending=User.objects.filter(approval_status='pending').first(),
+            traveller=traveller, admin=admin, refresh=str(RefreshToken.for_user(traveller)),
+            new_flight={
+                'departure_airport': 'JFK', 'arrival_airport': 'LAX', 'price': '199.00', 'available_seats': 150,
+                'departure_time': (start + timedelta(hours=20)).isoformat(), 'arrival_time': (start + timedelta(hours=23)).isoformat(),
+            },
+        )
+
+    def send(self, data, name, method, role, request):
+        args, payload = request(data)
+        client = APIClient()
+        if role != 'anonymous':
+            user = data.traveller if role == 'user' else data.admin
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {MyTokenObtainPairSerializer.get_token(user).access_token}')
+        response = getattr(client, method)(reverse(name, args=args), payload, **({} if method == 'get' else {'format': 'json'}))
+        if response.streaming:
+            # Streamed exports query while the body is read
+            b''.join(response.streaming_content)
+        return response
+
+    def measure(self, scale):
+        # {(url name, method): QueryBudget} for one request to each endpoint, each rolled back
+        budgets = {}
+        with transaction.atomic():
+            data = self.build_dataset(scale)
+            for name, method, role, limit, request in ENDPOINT_QUERY_BUDGETS:
+                with self.subTest(endpoint=name, method=method, scale=scale), transaction.atomic():
+                    cache.clear()
+                    # Steady state: the route graph is warm, every other cache cold
+                    get_route_graph()
+                    with QueryBudget(limit) as budget, self.captureOnCommitCallbacks(execute=True):
+                        response = self.send(data, name, method, role, request)
+                    self.assertLess(response.status_code, 400, f'{name}: {getattr(response, "data", response)}')
+                    budgets[name, method] = budget
+                    transaction.set_rollback(True)
+            transaction.set_rollback(True)
+        return budgets
+
+    def test_every_endpoint_has_a_query_budget(self):
+        names = {pattern.name for pattern in flight_urls.urlpatterns + user_urls.urlpatterns}
+        names |= {'token_obtain_pair', 'token_refresh', 'metrics'}
+        budgeted = {name for name, *_ in ENDPOINT_QUERY_BUDGETS}
+        self.assertEqual(names - budgeted - QUERY_BUDGET_EXEMPT.keys(), set())
+
+    def test_query_counts_stay_within_budget_as_data_grows(self):
+        small, large = (self.measure(scale) for scale in self.SCALES)
+        # Endpoints over budget at either scale have already failed in measure()
+        for endpoint in small.keys() & large.keys():
+            with self.subTest(endpoint=endpoint):
+                growth = compare_budgets(small[endpoint], large[endpoint])
+                if growth:
+                    self.fail(growth)
+
+    def test_query_budget_reports_sql_by_call_site(self):
+        self.build_dataset(1)
+
+        def flight_numbers(budget, count):
+            with budget:
+                return [booking.flight.flight_number for booking in Booking.objects.order_by('id')[:count]]
+
+        small, large = QueryBudget(), QueryBudget()
+        flight_numbers(small, 1)
+        flight_numbers(large, 3)
+        report = compare_budgets(small, large)
+        self.assertIn('Query count changed with the data size: 2 -> 4.', report)
+        self.assertIn('1 -> 3x flights/tests.py', report)
+        self.assertIn('SELECT "flights_flight"."id"', report)
+        self.assertIsNone(compare_budgets(small, small))
+        with self.assertRaisesMessage(AssertionError, '4 queries ran, over the budget of 2.'):
+            flight_numbers(QueryBudget(2), 3)
@@ -3,15 +3,27 @@ from . import views
 
 urlpatterns = [
     path('flights/search/', views.FlightSearchView.as_view(), name='flight-search'),
+    path('flights/connections/', views.FlightConnectionsView.as_view(), name='flight-connections'),
     path('flights/<int:pk>/', views.FlightDetailView.as_view(), name='flight-detail'),
     path('bookings/', views.BookingCreateView.as_view(), name='booking-create'),
+    path('bookings/itinerary/', views.ItineraryBookingView.as_view(), name='itinerary-booking'),
     path('bookings/my-trips/', views.UserBookingsView.as_view(), name='user-bookings'),
     path('bookings/<int:pk>/', views.BookingDetailView.as_view(), name='booking-detail'),
+    path('holds/', views.SeatHoldCreateView.as_view(), name='seat-hold-create'),
+    path('holds/<int:pk>/', views.SeatHoldDetailView.as_view(), name='seat-hold-detail'),
+    path('holds/<int:pk>/book/', views.SeatHoldBookView.as_view(), name='seat-hold-book'),
     path('admin/users/pending/', views.AdminPendingUsersView.as_view(), name='admin-pending-users'),
     path('admin/users/<int:pk>/approve/', views.AdminApproveUserView.as_view(), name='admin-approve-user'),
+    path('admin/users/approval/', views.AdminBulkUserApprovalView.as_view(), name='admin-bulk-user-approval'),
     path('admin/flights/', views.AdminFlightManagementView.as_view(), name='admin-flight-management'),
+    path('admin/flights/status/', views.AdminBulkFlightStatusView.as_view(), name='admin-bulk-flight-status'),
+    path('admin/flights/import/', views.AdminFlightImportView.as_view(), name='admin-flight-import'),
     path('admin/flights/<int:pk>/status/', views.AdminFlightStatusUpdateView.as_view(), name='admin-flight-status-update'),
+    path('fares/calendar/', views.FareCalendarView.as_view(), name='fare-calendar'),
+    path('admin/exports/bookings/', views.AdminBookingExportView.as_view(), name='admin-booking-export'),
+    path('admin/flights/<int:pk>/manifest/', views.AdminFlightManifestView.as_view(), name='admin-flight-manifest'),
     path('airports/', views.AirportListView.as_view(), name='airport-list'),
     path('all-flights/', views.AllFlightsView.as_view(), name='all-flights'),
     path('flights/<int:flight_id>/occupied-seats/', views.OccupiedSeatsView.as_view(), name='occupied-seats'),
+    path('flights/<int:flight_id>/events/', views.flight_events, name='flight-events'),
 ]
@@ -1,31 +1,148 @@
 from rest_framework import generics, permissions, status
-from rest_framework.exceptions import NotAuthenticated
+from rest_framework.exceptions import NotAuthenticated, NotFound, ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .models import Flight, Booking
+from .models import Airport, DailyFare, DisruptionNotice, Flight, Booking, SeatHold, SeatReservation, parse_airport_code
 from users.models import User
-from .serializers import FlightSerializer, BookingSerializer
+from .serializers import FlightSerializer, BookingSerializer, CompactFlightSerializer, CompactBookingSerializer, SeatHoldSerializer, ItinerarySerializer, ConnectionLegSerializer, BulkFlightStatusSerializer, BulkUserApprovalSerializer
+from .outbox import queue_email
+from .pagination import KeysetPagination
+from .fastpath import ValuesSerializer
+from .search_cache import invalidate_search_routes, search_cache_key
+from .holds import hold_expiry, release_expired_holds, release_holds
+from .routes import get_route_graph, itinerary_duration, itinerary_price
+from .fares import fare_key, refresh_fares_on_commit
+from .imports import FlightCSVParser, import_flights
+from .disruptions import set_flight_status
+from .approvals import set_approval_status
+from .exports import BOOKING_COLUMNS, FORMATS as EXPORT_FORMATS, MANIFEST_COLUMNS, export_response
+from .events import flight_channel, get_broker, publish_flight_change
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, registry as metrics_registry
+from .occupancy import get_occupancy, seats_changed, occupied_seat_list, held_seat_list, encode_occupancy
+from users.authentication import StatelessJWTAuthentication, full_user
 from users.serializers import UserSerializer
-from django.core.mail import send_mail
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import datetime, time, timedelta
+import asyncio
+import hashlib
+import json
+
+def filter_airport(queryset, field, value):
+    # Exact IATA code match uses the route index; anything else falls back to free text
+    code = parse_airport_code(value)
+    if code:
+        return queryset.filter(**{f'{field}_code': code})
+    return queryset.filter(**{f'{field}_airport__icontains': value})
+
+def day_start(value, param, expected='YYYY-MM-DD'):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({param: f'Enter a valid date in {expected} format.'})
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+def conditional_response(request, etag, build, last_modified=None):
+    # build() only runs when the client's cached copy is stale; otherwise this is a bodiless 304
+    timestamp = last_modified.timestamp() if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = build()
+    response.headers['ETag'] = etag
+    if timestamp is not None:
+        response.headers['Last-Modified'] = http_date(timestamp)
+    return response
+
+class CompactModeMixin:
+    # ?fields=compact swaps in a serializer that only carries flight id, number, times and status
+    compact_serializer_class = None
+
+    def get_serializer_class(self):
+        fields = self.request.query_params.get('fields')
+        if fields is None or self.request.method != 'GET':
+            return super().get_serializer_class()
+        if fields != 'compact':
+            raise ValidationError({'fields': 'Only "compact" is supported.'})
+        return self.compact_serializer_class
+
+class ValuesListMixin:
+    # Read-only list fast path: rows come from .values() and skip per-field DRF serialization
+    def list(self, request, *args, **kwargs):
+        serializer = ValuesSerializer(self.get_serializer_class())
+        queryset = self.filter_queryset(self.get_queryset())
+        # The keyset paginator also needs the ordering columns to build cursors
+        ordering = [field.lstrip('-') for field in queryset.query.order_by or getattr(self, 'keyset_ordering', ())]
+        queryset = queryset.values(*dict.fromkeys(serializer.columns + ordering))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.many(page))
+        return Response(serializer.many(queryset))
 
 class AirportListView(APIView):
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, *args, **kwargs):
-        departure_airports = Flight.objects.values_list('departure_airport', flat=True).distinct()
-        arrival_airports = Flight.objects.values_list('arrival_airport', flat=True).distinct()
-        airports = sorted(list(set(list(departure_airports) + list(arrival_airports))))
-        return Response(airports)
+        payload = cache.get(Airport.LIST_CACHE_KEY)
+        if payload is None:
+            airports = list(Airport.objects.values_list('name', flat=True))
+            digest = hashlib.md5(json.dumps(airports).encode('utf-8')).hexdigest()
+            payload = {'etag': f'"airports-{digest}"', 'airports': airports}
+            # No timeout: Airport writes invalidate this key
+            cache.set(Airport.LIST_CACHE_KEY, payload, None)
+        return conditional_response(request, payload['etag'], lambda: Response(payload['airports']))
 
-class AllFlightsView(generics.ListAPIView):
+class AllFlightsView(CompactModeMixin, ValuesListMixin, generics.ListAPIView):
     queryset = Flight.objects.all()
     serializer_class = FlightSerializer
+    compact_serializer_class = CompactFlightSerializer
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.AllowAny]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('departure_time', 'id')
 
-class FlightSearchView(generics.ListAPIView):
+    def list(self, request, *args, **kwargs):
+        # Any flight write moves the newest updated_at; a delete does not, so the row count goes into the ETag too
+        # (as RouteGraph.refresh does). No Last-Modified, since a date alone cannot show that a flight was deleted
+        latest = Flight.objects.aggregate(updated_at=Max('updated_at'), count=Count('id'))
+        version = f'{latest["updated_at"].isoformat()}|{latest["count"]}' if latest['updated_at'] else 'empty'
+        digest = hashlib.md5(f'{request.get_full_path()}|{version}'.encode('utf-8')).hexdigest()
+        return conditional_response(
+            request, f'"flights-{digest}"', lambda: super(AllFlightsView, self).list(request, *args, **kwargs)
+        )
+
+class FlightSearchView(CompactModeMixin, ValuesListMixin, generics.ListAPIView):
     serializer_class = FlightSerializer
+    compact_serializer_class = CompactFlightSerializer
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.AllowAny]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('departure_time', 'id')
+    sort_fields = ('price', 'departure_time', 'arrival_time')
+
+    def list(self, request, *args, **kwargs):
+        # Same route/dates/filters/page share one cached page; route writes rotate the key
+        key = search_cache_key(request)
+        data = cache.get(key)
+        if data is None:
+            response = super().list(request, *args, **kwargs)
+            # The timeout bounds staleness from writes that skip invalidation
+            cache.set(key, response.data, settings.SEARCH_CACHE_TIMEOUT)
+            return response
+        return Response(data)
 
     def get_queryset(self):
         queryset = Flight.objects.all()
@@ -39,114 +156,363 @@ class FlightSearchView(generics.ListAPIView):
         end_date = self.request.query_params.get('end_date')
 
         if departure_airport:
-            queryset = queryset.filter(departure_airport__icontains=departure_airport)
+            queryset = filter_airport(queryset, 'departure', departure_airport)
         if arrival_airport:
-            queryset = queryset.filter(arrival_airport__icontains=arrival_airport)
+            queryset = filter_airport(queryset, 'arrival', arrival_airport)
         if flight_number:
             queryset = queryset.filter(flight_number__icontains=flight_number)
+        # Dates become half-open datetime ranges so the departure_time indexes apply
         if departure_date:
-            queryset = queryset.filter(departure_time__date=departure_date)
-        
+            start = day_start(departure_date, 'departure_date')
+            queryset = queryset.filter(departure_time__gte=start, departure_time__lt=start + timedelta(days=1))
+
         if min_price:
             queryset = queryset.filter(price__gte=min_price)
         if max_price:
             queryset = queryset.filter(price__lte=max_price)
         if start_date:
-            queryset = queryset.filter(departure_time__date__gte=start_date)
+            queryset = queryset.filter(departure_time__gte=day_start(start_date, 'start_date'))
         if end_date:
-            queryset = queryset.filter(departure_time__date__lte=end_date)
+            queryset = queryset.filter(departure_time__lt=day_start(end_date, 'end_date') + timedelta(days=1))
             
         sort_by = self.request.query_params.get('sort_by')
         sort_order = self.request.query_params.get('sort_order', 'asc')
 
         if sort_by:
+            if sort_by not in self.sort_fields:
+                raise ValidationError({'sort_by': f'Choose one of: {", ".join(self.sort_fields)}.'})
             if sort_order == 'desc':
                 sort_by = f'-{sort_by}'
             queryset = queryset.order_by(sort_by)
 
         return queryset
 
-class FlightDetailView(generics.RetrieveAPIView):
+def int_param(params, name, default, minimum, maximum):
+    value = params.get(name)
+    if not value:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        value = None
+    if value is None or not minimum <= value <= maximum:
+        raise ValidationError({name: f'Enter a whole number from {minimum} to {maximum}.'})
+    return value
+
+class FlightConnectionsView(APIView):
+    # Direct, 1-stop and 2-stop itineraries, answered from the in-memory route graph rather than SQL joins
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [permissions.AllowAny]
+    sort_keys = {
+        'price': lambda path: (itinerary_price(path), itinerary_duration(path)),
+        'duration': lambda path: (itinerary_duration(path), itinerary_price(path)),
+    }
+    leg_serializer = ValuesSerializer(ConnectionLegSerializer)
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        codes = {}
+        for param in ('departure_airport', 'arrival_airport'):
+            codes[param] = parse_airport_code(params.get(param, ''))
+            if not codes[param]:
+                raise ValidationError({param: 'Enter an airport code, e.g. "LUN" or "Lusaka International Airport (LUN)".'})
+        start = day_start(params.get('departure_date', ''), 'departure_date')
+        max_stops = int_param(params, 'max_stops', 2, 0, 2)
+        min_layover = int_param(params, 'min_layover', settings.CONNECTION_MIN_LAYOVER, 0, 24 * 60)
+        max_layover = int_param(params, 'max_layover', settings.CONNECTION_MAX_LAYOVER, min_layover, 48 * 60)
+        seats = int_param(params, 'seats', 1, 1, 9)
+        limit = int_param(params, 'limit', 20, 1, 100)
+        sort_by = params.get('sort_by', 'price')
+        if sort_by not in self.sort_keys:
+            raise ValidationError({'sort_by': f'Choose one of: {", ".join(self.sort_keys)}.'})
+
+        paths = get_route_graph().connections(
+            codes['departure_airport'], codes['arrival_airport'], start, start + timedelta(days=1),
+            max_stops=max_stops, min_layover=timedelta(minutes=min_layover), max_layover=timedelta(minutes=max_layover), seats=seats,
+        )
+        paths.sort(key=self.sort_keys[sort_by])
+        price_field = ConnectionLegSerializer().fields['price']
+        results = []
+        for path in paths[:limit]:
+            flights = [self.leg_serializer.to_representation(leg._asdict()) for leg in path]
+            results.append({
+                'stops': len(path) - 1,
+                'price': price_field.to_representation(itinerary_price(path)),
+                'duration_minutes': int(itinerary_duration(path).total_seconds() // 60),
+                'departure_time': flights[0]['departure_time'],
+                'arrival_time': flights[-1]['arrival_time'],
+                'flights': flights,
+            })
+        return Response({'count': len(paths), 'results': results})
+
+class FareCalendarView(APIView):
+    # Cheapest bookable fare per day of a month for one route, read from the DailyFare aggregate
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        codes = {}
+        for param in ('from', 'to'):
+            codes[param] = parse_airport_code(params.get(param, ''))
+            if not codes[param]:
+                raise ValidationError({param: 'Enter an airport code, e.g. "LUN" or "Lusaka International Airport (LUN)".'})
+        first = day_start(f'{params.get("month", "")}-01', 'month', 'YYYY-MM').date()
+        days_in_month = ((first + timedelta(days=32)).replace(day=1) - first).days
+
+        # One range read on daily_fare_route_date_uniq
+        fares = {
+            fare.date: fare for fare in DailyFare.objects.filter(
+                departure_code=codes['from'], arrival_code=codes['to'],
+                date__gte=first, date__lt=first + timedelta(days=days_in_month),
+            )
+        }
+        price_field = FlightSerializer().fields['price']
+        days = []
+        for offset in range(days_in_month):
+            date = first + timedelta(days=offset)
+            fare = fares.get(date)
+            days.append({
+                'date': date.isoformat(),
+                'min_price': price_field.to_representation(fare.min_price) if fare and fare.min_price is not None else None,
+                'available_flights': fare.available_flights if fare else 0,
+                # False for sold-out days as well as days without flights
+                'available': bool(fare and fare.available_flights),
+            })
+        return Response({'from': codes['from'], 'to': codes['to'], 'month': first.strftime('%Y-%m'), 'days': days})
+
+class FlightDetailView(CompactModeMixin, generics.RetrieveAPIView):
     queryset = Flight.objects.all()
     serializer_class = FlightSerializer
+    compact_serializer_class = CompactFlightSerializer
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.AllowAny]
 
+    def retrieve(self, request, *args, **kwargs):
+        flight = self.get_object()
+        representation = 'compact' if request.query_params.get('fields') == 'compact' else 'full'
+        etag = f'"flight-{flight.pk}-{representation}-{flight.updated_at.timestamp()}"'
+        return conditional_response(request, etag, lambda: Response(self.get_serializer(flight).data), flight.updated_at)
+
+def claim_seats(flight, seats):
+    # Runs inside the caller's transaction; returns an error message, or None once the seats are counted off
+    # Check for duplicate seats (indexed lookup on the seat inventory)
+    taken_seat = SeatReservation.objects.filter(
+        flight=flight, seat__in=seats
+    ).values_list('seat', flat=True).first()
+    if taken_seat is not None:
+        return f'Seat {taken_seat} is already occupied. Please select another seat.'
+
+    # Decrement in the database only while enough seats remain; the UPDATE holds the row lock until commit
+    updated = Flight.objects.filter(pk=flight.pk, available_seats__gte=len(seats)).update(
+        available_seats=F('available_seats') - len(seats), updated_at=timezone.now()
+    )
+    if not updated:
+        return 'Not enough available seats on this flight.'
+    flight.refresh_from_db(fields=['available_seats', 'updated_at'])
+    transaction.on_commit(lambda: invalidate_search_routes([(flight.departure_code, flight.arrival_code)]))
+    if not flight.available_seats:
+        # Sold out: the day's cheapest bookable fare may have moved
+        refresh_fares_on_commit([fare_key(flight)])
+    return None
+
+def queue_booking_confirmation(user, bookings):
+    # Queue one confirmation email covering every booking, with the bookings themselves
+    user = full_user(user)
+    details = "\n".join(f"""
+    Flight Number: {booking.flight.flight_number}
+    Departure Airport: {booking.flight.departure_airport}
+    Arrival Airport: {booking.flight.arrival_airport}
+    Departure Time: {booking.flight.departure_time}
+    Seats Reserved: {", ".join(booking.seats_reserved)}""" for booking in bookings)
+    subject = 'Your Flight Booking Confirmation'
+    message = f"""
+    Dear {user.username},
+
+    Your flight booking has been confirmed.
+
+    Booking Details:{details}
+
+    Thank you for booking with us.
+
+    Best regards,
+    The AirBooking Team
+    """
+    queue_email(subject, message, [user.email])
+
+SEATS_TAKEN_ERROR = 'One or more selected seats are already occupied. Please select other seats.'
+
+class ItineraryRejected(Exception):
+    pass
+
 class BookingCreateView(generics.CreateAPIView):
     serializer_class = BookingSerializer
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         flight = serializer.validated_data['flight']
-        seats_reserved = serializer.validated_data.get('seats_reserved', [])
-        num_seats_reserved = len(seats_reserved)
-
-        # Check for duplicate seats
-        existing_bookings = Booking.objects.filter(flight=flight)
-        occupied_seats = []
-        for b in existing_bookings:
-            if b.seats_reserved:
-                occupied_seats.extend(b.seats_reserved)
-        
-        for seat in seats_reserved:
-            if seat in occupied_seats:
-                return Response(
-                    {'error': f'Seat {seat} is already occupied. Please select another seat.'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-        if flight.available_seats >= num_seats_reserved:
-            flight.available_seats -= num_seats_reserved
-            flight.save()
-            booking = serializer.save(user=self.request.user)
-            
-            # Send booking confirmation email
-            subject = 'Your Flight Booking Confirmation'
-            message = f"""
-            Dear {booking.user.username},
-
-            Your flight booking has been confirmed.
-
-            Booking Details:
-            Flight Number: {booking.flight.flight_number}
-            Departure Airport: {booking.flight.departure_airport}
-            Arrival Airport: {booking.flight.arrival_airport}
-            Departure Time: {booking.flight.departure_time}
-            Seats Reserved: {", ".join(seats_reserved)}
-
-            Thank you for booking with us.
-
-            Best regards,
-            The AirBooking Team
-            """
-            from_email = settings.DEFAULT_FROM_EMAIL
-            recipient_list = [booking.user.email]
-            send_mail(subject, message, from_email, recipient_list)
-            
-            headers = self.get_success_headers(serializer.data)
-            return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
-        else:
-            return Response({'error': 'Not enough available seats on this flight.'}, status=status.HTTP_400_BAD_REQUEST)
+        seats_reserved = serializer.validated_data['seats_reserved']
+        release_expired_holds(flight_id=flight.pk)
+
+        try:
+            with transaction.atomic():
+                error = claim_seats(flight, seats_reserved)
+                if error:
+                    return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+                booking = serializer.save(user=self.request.user, flight=flight)
+                # The unique (flight, seat) constraint is the final guard against double-selling
+                SeatReservation.objects.bulk_create([
+                    SeatReservation(flight=flight, booking=booking, seat=seat) for seat in seats_reserved
+                ])
+                transaction.on_commit(lambda: seats_changed(flight.pk, flight.available_seats, occupied=seats_reserved))
+                queue_booking_confirmation(self.request.user, [booking])
+        except IntegrityError:
+            return Response({'error': SEATS_TAKEN_ERROR}, status=status.HTTP_400_BAD_REQUEST)
+
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class UserBookingsView(generics.ListAPIView):
+class ItineraryBookingView(APIView):
+    # Books several flights (a round trip or connection) all-or-nothing, with one confirmation email
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = ItinerarySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        segments = serializer.validated_data['segments']
+        payment_status = serializer.validated_data['payment_status']
+        for segment in segments:
+            release_expired_holds(flight_id=segment['flight'].pk)
+
+        try:
+            with transaction.atomic():
+                # Claim in flight id order so two overlapping itineraries lock rows in the same order
+                for segment in sorted(segments, key=lambda segment: segment['flight'].pk):
+                    flight = segment['flight']
+                    error = claim_seats(flight, segment['seats_reserved'])
+                    if error:
+                        # Returning inside atomic() would commit the seats already claimed
+                        raise ItineraryRejected(f'{flight.flight_number}: {error}')
+                bookings = Booking.objects.bulk_create([
+                    Booking(user=request.user, flight=segment['flight'], seats_reserved=segment['seats_reserved'], payment_status=payment_status)
+                    for segment in segments
+                ])
+                SeatReservation.objects.bulk_create([
+                    SeatReservation(flight=booking.flight, booking=booking, seat=seat)
+                    for booking in bookings for seat in booking.seats_reserved
+                ])
+                for booking in bookings:
+                    flight = booking.flight
+                    transaction.on_commit(
+                        lambda flight=flight, seats=booking.seats_reserved: seats_changed(flight.pk, flight.available_seats, occupied=seats)
+                    )
+                queue_booking_confirmation(request.user, bookings)
+        except ItineraryRejected as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            return Response({'error': SEATS_TAKEN_ERROR}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'bookings': BookingSerializer(bookings, many=True).data}, status=status.HTTP_201_CREATED)
+
+class SeatHoldCreateView(generics.CreateAPIView):
+    serializer_class = SeatHoldSerializer
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        flight = serializer.validated_data['flight']
+        seats = serializer.validated_data['seats']
+        release_expired_holds(flight_id=flight.pk)
+
+        try:
+            with transaction.atomic():
+                error = claim_seats(flight, seats)
+                if error:
+                    return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+                hold = serializer.save(user=self.request.user, flight=flight, expires_at=hold_expiry())
+                SeatReservation.objects.bulk_create([
+                    SeatReservation(flight=flight, hold=hold, seat=seat) for seat in seats
+                ])
+                transaction.on_commit(lambda: seats_changed(flight.pk, flight.available_seats, held=seats))
+        except IntegrityError:
+            return Response({'error': SEATS_TAKEN_ERROR}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+class SeatHoldDetailView(APIView):
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def delete(self, request, pk, *args, **kwargs):
+        if not release_holds(SeatHold.objects.filter(pk=pk, user=request.user)):
+            raise NotFound()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class SeatHoldBookView(APIView):
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    expired_error = 'Your seat hold has expired. Please select your seats again.'
+
+    def post(self, request, pk, *args, **kwargs):
+        hold = get_object_or_404(SeatHold, pk=pk, user=request.user)
+        if hold.is_expired:
+            release_holds(SeatHold.objects.filter(pk=hold.pk))
+            return Response({'error': self.expired_error}, status=status.HTTP_410_GONE)
+
+        serializer = BookingSerializer(data={
+            'flight_id': hold.flight_id,
+            'seats_reserved': hold.seats,
+            'payment_status': request.data.get('payment_status', 'pending'),
+        })
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            # Re-read under lock so a sweep or a second conversion of the same hold cannot race this one
+            hold = SeatHold.objects.select_for_update().filter(pk=hold.pk, expires_at__gt=timezone.now()).first()
+            if hold is None:
+                return Response({'error': self.expired_error}, status=status.HTTP_410_GONE)
+            booking = serializer.save(user=request.user)
+            # The held seats move to the booking as they are; available_seats was already counted off
+            SeatReservation.objects.filter(hold=hold).update(booking=booking, hold=None)
+            hold.delete()
+            transaction.on_commit(lambda: seats_changed(booking.flight_id, booking.flight.available_seats, occupied=booking.seats_reserved))
+            queue_booking_confirmation(request.user, [booking])
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+class UserBookingsView(CompactModeMixin, generics.ListAPIView):
     serializer_class = BookingSerializer
+    compact_serializer_class = CompactBookingSerializer
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('booking_time', 'id')
 
     def get_queryset(self):
-        return Booking.objects.filter(user=self.request.user)
+        # The serializer reads booking.user.username and the nested flight, so join both
+        return Booking.objects.filter(user=self.request.user).select_related('user', 'flight')
 
-class BookingDetailView(generics.RetrieveAPIView):
-    queryset = Booking.objects.all()
+class BookingDetailView(CompactModeMixin, generics.RetrieveAPIView):
+    queryset = Booking.objects.select_related('user', 'flight')
     serializer_class = BookingSerializer
+    compact_serializer_class = CompactBookingSerializer
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
 class AdminPendingUsersView(generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = KeysetPagination
+    # Oldest sign-up first, served by user_approval_joined_idx
+    keyset_ordering = ('date_joined', 'id')
 
     def get_queryset(self):
         return User.objects.filter(approval_status='pending')
@@ -157,42 +523,215 @@ class AdminApproveUserView(generics.UpdateAPIView):
     permission_classes = [permissions.IsAdminUser]
 
     def perform_update(self, serializer):
-        user = serializer.instance
-        if user.approval_status != 'approved':
-            user.approval_status = 'approved'
+        with transaction.atomic():
+            # Queues the approval email with the update
+            set_approval_status(User.objects.filter(pk=serializer.instance.pk), 'approved')
+            serializer.instance.approval_status = 'approved'
             serializer.save()
-            # Synchronous email sending
-            subject = 'Your AirBooking Account Has Been Approved!'
-            message = f'Dear {user.username},\n\nYour account on AirBooking has been approved. You can now log in and start booking flights!\n\nBest regards,\nThe AirBooking Team'
-            from_email = settings.DEFAULT_FROM_EMAIL
-            recipient_list = [user.email]
-            try:
-                send_mail(subject, message, from_email, recipient_list)
-                print(f"Approval email sent synchronously to {user.email}")
-            except Exception as e:
-                print(f"Failed to send approval email to {user.email}: {e}")
+
+class AdminBulkUserApprovalView(APIView):
+    # Approves or rejects many users at once; their emails go out through the send_queued_emails worker
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = BulkUserApprovalSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        if 'user_ids' in data:
+            users = User.objects.filter(pk__in=data['user_ids'])
         else:
-            serializer.save()
+            users = User.objects.filter(approval_status='pending', date_joined__lt=data['joined_before'])
+            if 'joined_after' in data:
+                users = users.filter(date_joined__gte=data['joined_after'])
+            if 'email_domain' in data:
+                users = users.filter(email__iendswith=f'@{data["email_domain"]}')
+        user_ids = set_approval_status(users, data['approval_status'], limit=BulkUserApprovalSerializer.MAX_USERS)
+        response = {'updated': len(user_ids), 'user_ids': user_ids}
+        if 'user_ids' not in data:
+            # A filter can match more users than one call changes; post it again for the rest
+            response['remaining'] = users.count()
+        return Response(response, status=status.HTTP_200_OK)
 
-class AdminFlightManagementView(generics.ListCreateAPIView):
+class AdminFlightManagementView(CompactModeMixin, ValuesListMixin, generics.ListCreateAPIView):
     queryset = Flight.objects.all()
     serializer_class = FlightSerializer
+    compact_serializer_class = CompactFlightSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def perform_create(self, serializer):
+        flight = serializer.save()
+        transaction.on_commit(lambda: invalidate_search_routes([(flight.departure_code, flight.arrival_code)]))
+        refresh_fares_on_commit([fare_key(flight)])
+
+class AdminFlightImportView(APIView):
+    # Bulk schedule load: a JSON list or a CSV body (Content-Type: text/csv) of flights, validated and written in chunks
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [JSONParser, FlightCSVParser]
+
+    def post(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            raise ValidationError({'non_field_errors': ['Expected a list of flights.']})
+        report = import_flights(
+            request.data,
+            upsert=request.query_params.get('upsert') in ('1', 'true'),
+            dry_run=request.query_params.get('dry_run') in ('1', 'true'),
+        )
+        # Rows that failed are listed in the report; the valid ones were still written
+        return Response(report, status=status.HTTP_200_OK)
+
+class AdminBulkFlightStatusView(APIView):
+    # Sets the status of many flights at once, e.g. a weather cancellation; passengers are notified in the background
     permission_classes = [permissions.IsAdminUser]
 
+    def post(self, request, *args, **kwargs):
+        serializer = BulkFlightStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        if 'flight_ids' in data:
+            flights = Flight.objects.filter(pk__in=data['flight_ids'])
+        else:
+            flights = Flight.objects.filter(
+                Q(departure_code=data['airport'], departure_time__gte=data['start'], departure_time__lt=data['end'])
+                | Q(arrival_code=data['airport'], arrival_time__gte=data['start'], arrival_time__lt=data['end'])
+            )
+        changed, notice = set_flight_status(flights, data['status'])
+        return Response({
+            'updated': len(changed),
+            'flight_ids': [flight.pk for flight in changed],
+            'notice_id': notice.pk if notice else None,
+        }, status=status.HTTP_202_ACCEPTED)
+
 class AdminFlightStatusUpdateView(generics.UpdateAPIView):
     queryset = Flight.objects.all()
     serializer_class = FlightSerializer
     permission_classes = [permissions.IsAdminUser]
 
+    def perform_update(self, serializer):
+        # Searches on both the old and the new route can change
+        routes = [(serializer.instance.departure_code, serializer.instance.arrival_code)]
+        fare_keys = [fare_key(serializer.instance)]
+        old_status = serializer.instance.status
+        flight = serializer.save()
+        if flight.status != old_status:
+            # Passengers hear about it from the send_queued_emails worker
+            DisruptionNotice.objects.create(status=flight.status, flight_ids=[flight.pk])
+        routes.append((flight.departure_code, flight.arrival_code))
+        fare_keys.append(fare_key(flight))
+        transaction.on_commit(lambda: invalidate_search_routes(routes))
+        refresh_fares_on_commit(fare_keys)
+        transaction.on_commit(lambda: publish_flight_change(flight))
+
+def export_output(request):
+    output = request.query_params.get('output', 'csv')
+    if output not in EXPORT_FORMATS:
+        raise ValidationError({'output': f'Choose one of: {", ".join(EXPORT_FORMATS)}.'})
+    return output
+
+class AdminBookingExportView(APIView):
+    # Streams bookings as CSV or NDJSON (?output=) in constant memory; filters match the admin's month-end reports
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        output = export_output(request)
+        queryset = Booking.objects.all()
+        flight_id = request.query_params.get('flight_id')
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+        payment_status = request.query_params.get('payment_status')
+        if flight_id:
+            if not flight_id.isdigit():
+                raise ValidationError({'flight_id': 'Enter a flight id.'})
+            queryset = queryset.filter(flight_id=flight_id)
+        if start_date:
+            queryset = queryset.filter(booking_time__gte=day_start(start_date, 'start_date'))
+        if end_date:
+            queryset = queryset.filter(booking_time__lt=day_start(end_date, 'end_date') + timedelta(days=1))
+        if payment_status:
+            if payment_status not in dict(Booking.PAYMENT_STATUS_CHOICES):
+                raise ValidationError({'payment_status': f'Choose one of: {", ".join(dict(Booking.PAYMENT_STATUS_CHOICES))}.'})
+            queryset = queryset.filter(payment_status=payment_status)
+        # booking_time_idx delivers rows in order, so the database streams them without a sort
+        queryset = queryset.order_by('booking_time', 'id')
+        return export_response(request._request, queryset, BOOKING_COLUMNS, 'bookings', output)
+
+class AdminFlightManifestView(APIView):
+    # One row per booked seat on the flight, in seat order
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, pk, *args, **kwargs):
+        output = export_output(request)
+        flight = get_object_or_404(Flight.objects.only('flight_number'), pk=pk)
+        queryset = SeatReservation.objects.filter(flight_id=flight.pk, booking__isnull=False).order_by('seat')
+        return export_response(request._request, queryset, MANIFEST_COLUMNS, f'manifest-{flight.flight_number}-{flight.pk}', output)
+
+# Set on occupied-seats responses when this server streams flight_events
+SEAT_EVENTS_HEADER = 'X-Seat-Events'
+
 class OccupiedSeatsView(APIView):
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, flight_id, *args, **kwargs):
-        occupied_seats = []
-        bookings = Booking.objects.filter(flight_id=flight_id)
-        for booking in bookings:
-            if booking.seats_reserved:
-                occupied_seats.extend(booking.seats_reserved)
-        # Return unique occupied seats
-        return Response(list(set(occupied_seats)))
+        occupancy = get_occupancy(flight_id)
+        # ?encoding=bitmap returns a base64 bitset instead of the seat list
+        if request.query_params.get('encoding') == 'bitmap':
+            etag = f'"seats-{occupancy["version"]}-bitmap"'
+            return conditional_response(request, etag, lambda: Response(encode_occupancy(occupancy)))
+        etag = f'"seats-{occupancy["version"]}-list"'
+        response = conditional_response(
+            request, etag, lambda: Response({'occupied': occupied_seat_list(occupancy), 'held': held_seat_list(occupancy)})
+        )
+        if isinstance(request._request, ASGIRequest):
+            # Tells the booking page it can follow the seat map through flight_events
+            response[SEAT_EVENTS_HEADER] = 'live'
+        return response
+
+def server_sent_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+async def flight_events(request, flight_id):
+    # Server-sent events: a seat map snapshot, then seat and status deltas as they commit
+    if not isinstance(request, ASGIRequest):
+        # WSGI drains a streaming response into a list before sending it, which never ends for this stream
+        return JsonResponse(
+            {'detail': 'Live seat events need an ASGI server. Poll occupied-seats instead.'},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+    flight = await Flight.objects.filter(pk=flight_id).values('status', 'available_seats').afirst()
+    if flight is None:
+        raise Http404('No Flight matches the given query.')
 
+    async def stream():
+        broker = get_broker()
+        channel = flight_channel(flight_id)
+        # Subscribe before the snapshot so nothing published in between is missed
+        queue = broker.subscribe(channel)
+        try:
+            occupancy = await sync_to_async(get_occupancy)(flight_id)
+            yield server_sent_event('snapshot', {
+                **flight,
+                'occupied': occupied_seat_list(occupancy),
+                'held': held_seat_list(occupancy),
+            })
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), settings.SEAT_EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield server_sent_event(event['type'], event)
+        finally:
+            broker.unsubscribe(channel, queue)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+class MetricsView(APIView):
+    # Prometheus scrape target for RequestMetricsMiddleware's counters in this process
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+# User field -> access token claim, as written by MyTokenObtainPairSerializer.get_token
+CLAIM_FIELDS = {
+    'username': 'username',
+    'is_staff': 'is_admin',
+    'approval_status': 'approval_status',
+}
+
+
+def user_cache_key(user_id):
+    return f'users:user:{user_id}'
+
+
+def cached_user(user_id):
+    # The full row, shared by requests for AUTH_USER_CACHE_TIMEOUT seconds
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None:
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+def full_user(user):
+    # A claims-only user from StatelessJWTAuthentication, swapped for the complete model when a view needs more
+    if not user.get_deferred_fields():
+        return user
+    return cached_user(user.pk) or user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request User query.
+
+    The user is rebuilt from the access token's claims as a User instance
+    whose other fields are deferred: it works for permission checks, foreign
+    keys and ``user.username``, and reading any other field loads it from the
+    database. Use full_user() to fetch the whole row through a short-lived
+    cache instead. Tokens issued before the claims existed fall back to that
+    cache as well.
+
+    Claims are as fresh as the token: a user deactivated or demoted after
+    logging in keeps the old claims until the access token expires. It is
+    therefore opt-in, set as ``authentication_classes`` on hot passenger
+    views only; admin views keep the default JWTAuthentication, which reads
+    the user row on every request.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        claims = {field: validated_token.get(claim) for field, claim in CLAIM_FIELDS.items()}
+        if None in claims.values():
+            user = cached_user(user_id)
+            if user is None:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+            if not user.is_active:
+                raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+            return user
+        # Tokens are only issued to active users
+        values = {'id': user_id, 'is_active': True, **claims}
+        # from_db() pairs values with fields in model field order
+        field_names = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+        return User.from_db(DEFAULT_DB_ALIAS, field_names, [values[name] for name in field_names])
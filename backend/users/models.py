@@ -12,3 +12,9 @@ class User(AbstractUser):
         choices=APPROVAL_STATUS_CHOICES,
         default='pending',
     )
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # The admin's pending-users queue, oldest sign-up first
+            models.Index(fields=['approval_status', 'date_joined', 'id'], name='user_approval_joined_idx'),
+        ]
@@ -10,6 +10,7 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         # Add custom claims
         token['username'] = user.username
         token['is_admin'] = user.is_staff
+        token['approval_status'] = user.approval_status
         return token
 
 class UserSerializer(serializers.ModelSerializer):
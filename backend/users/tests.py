@@ -1,3 +1,35 @@
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from .authentication import StatelessJWTAuthentication, full_user
+from .models import User
+from .serializers import MyTokenObtainPairSerializer
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='pilot', password='testpassword', email='pilot@example.com', is_staff=True, approval_status='approved'
+        )
+        self.authentication = StatelessJWTAuthentication()
+
+    def test_user_built_from_claims(self):
+        token = MyTokenObtainPairSerializer.get_token(self.user).access_token
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(token)
+            self.assertEqual((user.pk, user.username, user.is_staff, user.approval_status), (self.user.pk, 'pilot', True, 'approved'))
+            self.assertTrue(user.is_authenticated)
+        # Anything beyond the claims comes from the cached full row
+        with self.assertNumQueries(1):
+            self.assertEqual(full_user(user).email, 'pilot@example.com')
+        with self.assertNumQueries(0):
+            self.assertEqual(full_user(user).email, 'pilot@example.com')
+
+    def test_token_without_claims_falls_back_to_cached_lookup(self):
+        token = AccessToken.for_user(self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authentication.get_user(token).email, 'pilot@example.com')
+        with self.assertNumQueries(0):
+            self.authentication.get_user(token)
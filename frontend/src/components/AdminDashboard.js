@@ -56,7 +56,7 @@ const AdminDashboard = () => {
                     const res = await axios.get('http://localhost:8000/api/admin/users/pending/', {
                         headers: { Authorization: `Bearer ${token}` },
                     });
-                    setPendingUsers(res.data);
+                    setPendingUsers(res.data.results);
                 } catch (err) {
                     console.error(err.response?.data);
                     setError('Failed to fetch pending users.');
@@ -90,19 +90,22 @@ const AdminDashboard = () => {
         }
     }, [isAuthenticated, isAdmin]);
 
+    const setApprovalStatus = async (userId, approvalStatus) => {
+        const token = localStorage.getItem('access_token');
+        await axios.post(
+            'http://localhost:8000/api/admin/users/approval/',
+            { approval_status: approvalStatus, user_ids: [userId] },
+            {
+                headers: { Authorization: `Bearer ${token}` },
+            }
+        );
+        setPendingUsers(pendingUsers.filter((user) => user.id !== userId)); // Remove from pending list
+    };
+
     const handleApproveUser = async (userId) => {
         try {
-            const token = localStorage.getItem('access_token');
-            await axios.post(
-                `http://localhost:8000/api/admin/users/${userId}/approve/`,
-                {},
-                {
-                    headers: { Authorization: `Bearer ${token}` },
-                }
-            );
+            await setApprovalStatus(userId, 'approved');
             setSuccessMessage('User approved successfully!');
-            setPendingUsers(pendingUsers.filter((user) => user.id !== userId)); // Remove from pending list
-            // Optionally, re-fetch all users to ensure consistency if needed
         } catch (err) {
             console.error(err.response?.data);
             setError('Failed to approve user.');
@@ -110,12 +113,9 @@ const AdminDashboard = () => {
     };
 
     const handleRejectUser = async (userId) => {
-        // This functionality needs a backend endpoint. Assuming one exists or can be created.
-        // For now, we'll just filter from the list and show a success message
         try {
-            // await axios.post(`http://localhost:8000/api/admin/users/${userId}/reject/`, {}, { headers: { Authorization: `Bearer ${token}` } });
-            setSuccessMessage('User rejected successfully! (Backend endpoint needs implementation)');
-            setPendingUsers(pendingUsers.filter((user) => user.id !== userId));
+            await setApprovalStatus(userId, 'rejected');
+            setSuccessMessage('User rejected successfully!');
         } catch (err) {
             console.error(err.response?.data);
             setError('Failed to reject user.');
@@ -22,6 +22,7 @@ const BookFlight = () => {
     const [selectedSeats, setSelectedSeats] = useState([]);
     const [occupiedSeats, setOccupiedSeats] = useState([]);
     const [bookedData, setBookedData] = useState(null);
+    const [liveSeats, setLiveSeats] = useState(false);
 
     useEffect(() => {
         const fetchDetails = async (retryWithoutToken = false) => {
@@ -37,7 +38,10 @@ const BookFlight = () => {
                 const occupiedSeatsRes = await axios.get(`http://127.0.0.1:8000/api/flights/${flightId}/occupied-seats/`, {
                     headers: headers,
                 });
-                setOccupiedSeats(occupiedSeatsRes.data);
+                // Seats held by someone else's checkout are just as unavailable as booked ones
+                setOccupiedSeats([...occupiedSeatsRes.data.occupied, ...occupiedSeatsRes.data.held]);
+                // Only ASGI deployments stream seat events; otherwise the fetched seat map is all there is
+                setLiveSeats(occupiedSeatsRes.headers['x-seat-events'] === 'live');
 
             } catch (err) {
                 if (err.response?.status === 401 && !retryWithoutToken) {
@@ -56,6 +60,42 @@ const BookFlight = () => {
         fetchDetails();
     }, [flightId, isAuthenticated]);
 
+    useEffect(() => {
+        if (!liveSeats) {
+            return undefined;
+        }
+        // Live seat map: a snapshot on connect, then deltas as other passengers book, hold and release seats
+        let source;
+        const connect = () => {
+            source = new EventSource(`http://127.0.0.1:8000/api/flights/${flightId}/events/`);
+            source.addEventListener('snapshot', (event) => {
+                const data = JSON.parse(event.data);
+                setOccupiedSeats([...data.occupied, ...data.held]);
+            });
+            source.addEventListener('seats', (event) => {
+                const data = JSON.parse(event.data);
+                setOccupiedSeats(prev => [
+                    ...prev.filter(seat => !data.released.includes(seat)),
+                    ...data.occupied.filter(seat => !prev.includes(seat)),
+                    ...data.held.filter(seat => !prev.includes(seat)),
+                ]);
+                setSelectedSeats(prev => prev.filter(seat => !data.occupied.includes(seat) && !data.held.includes(seat)));
+                setFlight(prev => prev && { ...prev, available_seats: data.available_seats });
+            });
+            source.addEventListener('flight', (event) => {
+                const { type, ...changes } = JSON.parse(event.data);
+                setFlight(prev => prev && { ...prev, ...changes });
+            });
+            source.addEventListener('resync', () => {
+                // Too many missed deltas: reconnect for a fresh snapshot
+                source.close();
+                connect();
+            });
+        };
+        connect();
+        return () => source.close();
+    }, [flightId, liveSeats]);
+
     const handleSeatClick = (seatNumber) => {
         if (occupiedSeats.includes(seatNumber)) {
             return; // Cannot select occupied seats
@@ -12,6 +12,10 @@ const Flights = () => {
     const [flights, setFlights] = useState([]);
     const [airports, setAirports] = useState([]);
     const [allFlights, setAllFlights] = useState([]);
+    // Cursor URLs of the next page of search results and of all flights, null on the last page
+    const [nextPage, setNextPage] = useState(null);
+    const [allFlightsNext, setAllFlightsNext] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [formData, setFormData] = useState({
         departure_airport: '',
         arrival_airport: '',
@@ -43,7 +47,8 @@ const Flights = () => {
         const fetchAllFlights = async () => {
             try {
                 const res = await axios.get('http://127.0.0.1:8000/api/all-flights/');
-                setAllFlights(res.data);
+                setAllFlights(res.data.results);
+                setAllFlightsNext(res.data.next);
             } catch (err) {
                 console.error('Failed to fetch all flights:', err);
                 setError(`Failed to load flights: ${err.message}. Check if server is running at 127.0.0.1:8000`);
@@ -77,6 +82,7 @@ const Flights = () => {
         setLoading(true);
         setError('');
         setFlights([]);
+        setNextPage(null);
         setNoFlightsFound(false);
 
         const params = {
@@ -100,8 +106,9 @@ const Flights = () => {
                     headers: headers,
                     params: params,
                 });
-                setFlights(res.data);
-                if (res.data.length === 0) {
+                setFlights(res.data.results);
+                setNextPage(res.data.next);
+                if (res.data.results.length === 0) {
                     setNoFlightsFound(true);
                 }
             } catch (err) {
@@ -136,10 +143,33 @@ const Flights = () => {
             sort_order: 'asc',
         });
         setFlights([]);
+        setNextPage(null);
         setNoFlightsFound(false);
     };
 
     const displayFlights = flights.length > 0 ? flights : allFlights;
+    const displayNext = flights.length > 0 ? nextPage : allFlightsNext;
+
+    const onLoadMore = async () => {
+        const searching = flights.length > 0;
+        setLoadingMore(true);
+        try {
+            // The next URL carries the search filters and the cursor
+            const res = await axios.get(displayNext);
+            if (searching) {
+                setFlights(prev => [...prev, ...res.data.results]);
+                setNextPage(res.data.next);
+            } else {
+                setAllFlights(prev => [...prev, ...res.data.results]);
+                setAllFlightsNext(res.data.next);
+            }
+        } catch (err) {
+            console.error('Load more flights error:', err);
+            setError(`Failed to load more flights: ${err.response?.data?.detail || err.message}`);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
     return (
         <Container component="main" maxWidth="md" sx={{ mt: 4, mb: 8 }}>
@@ -370,6 +400,13 @@ const Flights = () => {
                             ))}
                         </Grid>
                     )}
+                    {!loading && displayNext && (
+                        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 3 }}>
+                            <Button variant="outlined" onClick={onLoadMore} disabled={loadingMore}>
+                                {loadingMore ? <CircularProgress size={24} color="inherit" /> : 'Load More Flights'}
+                            </Button>
+                        </Box>
+                    )}
                 </Box>
             </Paper>
         </Container>
@@ -40,10 +40,10 @@ describe('Flights Component', () => {
                 return Promise.resolve({ data: mockAirports });
             }
             if (url.includes('/api/all-flights/')) {
-                return Promise.resolve({ data: mockFlights });
+                return Promise.resolve({ data: { next: null, previous: null, results: mockFlights } });
             }
             if (url.includes('/api/flights/search/')) {
-                return Promise.resolve({ data: mockFlights });
+                return Promise.resolve({ data: { next: null, previous: null, results: mockFlights } });
             }
             return Promise.reject(new Error('not found'));
         });
@@ -97,9 +97,9 @@ describe('Flights Component', () => {
     test('displays a message when no flights are found', async () => {
         axios.get.mockImplementation((url) => {
             if (url.includes('/api/flights/search/')) {
-                return Promise.resolve({ data: [] });
+                return Promise.resolve({ data: { next: null, previous: null, results: [] } });
             }
-            return Promise.resolve({ data: {} });
+            return Promise.resolve({ data: { results: [] } });
         });
 
         renderComponent();
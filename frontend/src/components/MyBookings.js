@@ -9,6 +9,9 @@ import DownloadIcon from '@mui/icons-material/Download';
 
 const MyBookings = () => {
     const [bookings, setBookings] = useState([]);
+    // Cursor URL of the next page of bookings, null on the last page
+    const [nextPage, setNextPage] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState('');
     const { isAuthenticated, user } = useAuth();
@@ -28,7 +31,8 @@ const MyBookings = () => {
                         Authorization: `Bearer ${token}`,
                     },
                 });
-                setBookings(res.data);
+                setBookings(res.data.results);
+                setNextPage(res.data.next);
             } catch (err) {
                 if (err.response?.status === 401) {
                     // Handled by global interceptor
@@ -44,6 +48,29 @@ const MyBookings = () => {
         fetchBookings();
     }, [isAuthenticated, user]);
 
+    const onLoadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const token = localStorage.getItem('access_token');
+            const res = await axios.get(nextPage, {
+                headers: {
+                    Authorization: `Bearer ${token}`,
+                },
+            });
+            setBookings(prev => [...prev, ...res.data.results]);
+            setNextPage(res.data.next);
+        } catch (err) {
+            if (err.response?.status === 401) {
+                // Handled by global interceptor
+                return;
+            }
+            // The bookings already shown stay up and the button stays for a retry
+            console.error('Load more bookings error:', err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     if (loading) {
         return (
             <Container component="main" maxWidth="md" sx={{ mt: 4 }}>
@@ -118,6 +145,13 @@ const MyBookings = () => {
                         ))}
                     </Grid>
                 )}
+                {nextPage && (
+                    <Box sx={{ display: 'flex', justifyContent: 'center', mt: 3 }}>
+                        <Button variant="outlined" onClick={onLoadMore} disabled={loadingMore}>
+                            {loadingMore ? <CircularProgress size={24} color="inherit" /> : 'Load More Bookings'}
+                        </Button>
+                    </Box>
+                )}
             </Paper>
         </Container>
     );
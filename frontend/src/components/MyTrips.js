@@ -1,19 +1,23 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 
+const getBookings = url => axios.get(url, {
+    headers: {
+        Authorization: `Bearer ${localStorage.getItem('token')}`,
+    },
+});
+
 const MyTrips = () => {
     const [bookings, setBookings] = useState([]);
+    // Cursor URL of the next page of bookings, null on the last page
+    const [nextPage, setNextPage] = useState(null);
 
     useEffect(() => {
         const fetchBookings = async () => {
             try {
-                const token = localStorage.getItem('token');
-                const res = await axios.get('http://localhost:8000/api/bookings/my-trips/', {
-                    headers: {
-                        Authorization: `Bearer ${token}`,
-                    },
-                });
-                setBookings(res.data);
+                const res = await getBookings('http://localhost:8000/api/bookings/my-trips/');
+                setBookings(res.data.results);
+                setNextPage(res.data.next);
             } catch (err) {
                 console.error(err.response.data);
             }
@@ -22,6 +26,16 @@ const MyTrips = () => {
         fetchBookings();
     }, []);
 
+    const loadMore = async () => {
+        try {
+            const res = await getBookings(nextPage);
+            setBookings(prev => [...prev, ...res.data.results]);
+            setNextPage(res.data.next);
+        } catch (err) {
+            console.error(err.response.data);
+        }
+    };
+
     return (
         <div>
             <h2>My Trips</h2>
@@ -32,6 +46,7 @@ const MyTrips = () => {
                     <p>Payment Status: {booking.payment_status}</p>
                 </div>
             ))}
+            {nextPage && <button onClick={loadMore}>Load more</button>}
         </div>
     );
 };